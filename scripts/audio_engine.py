@@ -0,0 +1,914 @@
+import argparse
+import io
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import queue
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from pydub import AudioSegment
+from pydub.silence import detect_nonsilent
+from pydub.utils import db_to_float
+
+import ratelimit
+import vocab_io
+
+# NumPy is optional; without it silence trimming falls back to pydub
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# --- 全局配置 ---
+CACHE_DIR = Path("cache")
+CACHE_EXPIRY = 30 * 24 * 3600
+AUDIO_CACHE_DIR = CACHE_DIR / "audio"
+AUDIO_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# Every decoded clip is normalized to one PCM format so clips can be joined directly
+SAMPLE_RATE = 44100
+CHANNELS = 1
+SAMPLE_WIDTH = 2 # 16-bit
+
+# Silence trimming parameters; part of the PCM cache key
+TRIM_MIN_SILENCE_LEN = 50 # ms
+TRIM_SILENCE_THRESH = -40 # dBFS
+
+# Cache entry kinds: the raw MP3, and trimmed PCM tagged with the output format and trim parameters
+KIND_MP3 = "mp3"
+KIND_PCM = "pcm-" + hashlib.md5(repr((SAMPLE_RATE, CHANNELS, SAMPLE_WIDTH, TRIM_MIN_SILENCE_LEN, TRIM_SILENCE_THRESH)).encode()).hexdigest()[:8]
+
+# Youdao dictvoice type codes
+VOICE_CODES = {'uk': 1, 'us': 2}
+
+# Build settings, same keys as the tool_mix GUI produces
+DEFAULT_CONFIG: Dict[str, Any] = {
+    'uk': True, 'us': True,
+    'max_threads': 16,
+    'interval_mode': 'fixed', 'fix_val': 0.5, 'rate_val': 0.6,
+    'stream': True,
+}
+
+def _subprocess_kwargs() -> Dict[str, Any]:
+    """Keep ffmpeg from flashing a console window on Windows; nothing to do elsewhere."""
+    if os.name != "nt": return {}
+    si = subprocess.STARTUPINFO()
+    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return {"startupinfo": si}
+
+class AudioCache:
+    """Content-addressed audio cache with an SQLite index and size-capped LRU eviction.
+
+    Blobs are stored once per content hash under `<root>/ab/cd/<sha1>`, so identical
+    clips share one file. The index maps the exact (word, voice, kind) to a blob, so a
+    hit is a single lookup and distinct words can never collide. Pinned entries are
+    never evicted, e.g. while a batch still needs them.
+    """
+    EVICT_INTERVAL = 200 # Run an eviction sweep every N insertions
+
+    def __init__(self, root: Path = AUDIO_CACHE_DIR, ttl: float = CACHE_EXPIRY, max_bytes: int = AUDIO_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._inserts = 0
+        self.pinned: Dict[Tuple[str, int, str], int] = {}
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.root / "index.db"), check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS clips ("
+            "word TEXT NOT NULL, voice INTEGER NOT NULL, kind TEXT NOT NULL, hash TEXT NOT NULL, "
+            "size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL, "
+            "PRIMARY KEY (word, voice, kind))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_clips_accessed ON clips(accessed)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_clips_hash ON clips(hash)")
+        self.conn.commit()
+        self.evict()
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def get(self, word: str, voice: int, kind: str = KIND_MP3, check_expiry: bool = True) -> Optional[bytes]:
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT hash, created FROM clips WHERE word = ? AND voice = ? AND kind = ?",
+                                    (word, voice, kind)).fetchone()
+            if row is None or (check_expiry and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+        try:
+            data = self.blob_path(row[0]).read_bytes()
+        except OSError:
+            # Blob removed behind our back; forget the entry
+            with self.lock:
+                self.conn.execute("DELETE FROM clips WHERE word = ? AND voice = ? AND kind = ?", (word, voice, kind))
+                self.conn.commit()
+                self.misses += 1
+            return None
+        with self.lock:
+            self.conn.execute("UPDATE clips SET accessed = ? WHERE word = ? AND voice = ? AND kind = ?",
+                              (now, word, voice, kind))
+            self.conn.commit()
+            self.hits += 1
+        return data
+
+    def put(self, word: str, voice: int, data: bytes, kind: str = KIND_MP3) -> bool:
+        """Store a clip; returns False if it could not be written."""
+        digest = hashlib.sha1(data).hexdigest()
+        path = self.blob_path(digest)
+        try:
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(f".{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, path) # Concurrent writers never expose a half-written blob
+            now = time.time()
+            with self.lock:
+                old = self.conn.execute("SELECT hash FROM clips WHERE word = ? AND voice = ? AND kind = ?",
+                                        (word, voice, kind)).fetchone()
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO clips (word, voice, kind, hash, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (word, voice, kind, digest, len(data), now, now)
+                )
+                self.conn.commit()
+                # A refreshed clip may have left its previous blob without any reference
+                if old and old[0] != digest and not self.conn.execute("SELECT 1 FROM clips WHERE hash = ? LIMIT 1", (old[0],)).fetchone():
+                    self.blob_path(old[0]).unlink(missing_ok=True)
+                self._inserts += 1
+                run_evict = self._inserts % self.EVICT_INTERVAL == 0
+        except (OSError, sqlite3.Error):
+            return False
+        if run_evict:
+            try:
+                self.evict()
+            except (OSError, sqlite3.Error) as e:
+                # The clip itself is stored; the next sweep tries again
+                logger.warning(f"Audio cache eviction failed: {e}")
+        return True
+
+    def pin(self, word: str, voice: int, kind: str = KIND_MP3) -> None:
+        """Keep an entry out of eviction until it is unpinned as often as it was pinned."""
+        key = (word, voice, kind)
+        with self.lock:
+            self.pinned[key] = self.pinned.get(key, 0) + 1
+
+    def unpin(self, word: str, voice: int, kind: str = KIND_MP3) -> None:
+        key = (word, voice, kind)
+        with self.lock:
+            if self.pinned.get(key, 0) > 1:
+                self.pinned[key] -= 1
+            else:
+                self.pinned.pop(key, None)
+
+    def total_bytes(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT hash, size FROM clips)").fetchone()[0]
+
+    def evict(self) -> None:
+        """Drop expired entries, then the least recently used ones until the blobs fit in max_bytes.
+
+        Pinned entries are skipped in both passes.
+        """
+        with self.lock:
+            candidates = set()
+            expired = self.conn.execute("SELECT word, voice, kind, hash FROM clips WHERE created < ?",
+                                        (time.time() - self.ttl,)).fetchall()
+            for word, voice, kind, digest in expired:
+                if (word, voice, kind) in self.pinned: continue
+                self.conn.execute("DELETE FROM clips WHERE word = ? AND voice = ? AND kind = ?", (word, voice, kind))
+                candidates.add(digest)
+
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT hash, size FROM clips)").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self.conn.execute("SELECT word, voice, kind, hash, size FROM clips ORDER BY accessed ASC").fetchall()
+                for word, voice, kind, digest, size in rows:
+                    if total <= self.max_bytes: break
+                    if (word, voice, kind) in self.pinned: continue
+                    self.conn.execute("DELETE FROM clips WHERE word = ? AND voice = ? AND kind = ?", (word, voice, kind))
+                    if not self.conn.execute("SELECT 1 FROM clips WHERE hash = ? LIMIT 1", (digest,)).fetchone():
+                        total -= size
+                        candidates.add(digest)
+            self.conn.commit()
+
+            # Only delete blobs nothing refers to any more
+            for digest in candidates:
+                if not self.conn.execute("SELECT 1 FROM clips WHERE hash = ? LIMIT 1", (digest,)).fetchone():
+                    self.blob_path(digest).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+_shared_cache: Optional[AudioCache] = None
+_shared_cache_lock = threading.Lock()
+
+def shared_cache() -> AudioCache:
+    """The process-wide audio cache."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = AudioCache()
+        return _shared_cache
+
+class AudioUtils:
+    @staticmethod
+    def trim_silence(audio: AudioSegment) -> AudioSegment:
+        if len(audio) == 0: return audio
+        if np is not None and audio.sample_width in (1, 2):
+            bounds = AudioUtils.nonsilent_bounds(audio)
+        else:
+            ranges = detect_nonsilent(audio, min_silence_len=TRIM_MIN_SILENCE_LEN, silence_thresh=TRIM_SILENCE_THRESH)
+            bounds = (ranges[0][0], ranges[-1][1]) if ranges else None
+        if bounds: return audio[bounds[0]:bounds[1]]
+        return audio
+
+    @staticmethod
+    def nonsilent_bounds(audio: AudioSegment, min_silence_len: int = TRIM_MIN_SILENCE_LEN,
+                         silence_thresh: float = TRIM_SILENCE_THRESH) -> Optional[Tuple[int, int]]:
+        """Vectorized equivalent of (ranges[0][0], ranges[-1][1]) from pydub's detect_nonsilent.
+
+        Every millisecond window's RMS comes from one cumulative sum of squared samples,
+        using pydub's frame rounding and integer RMS, so the result is identical.
+        Returns None when the clip has no non-silent part.
+        """
+        seg_len = len(audio)
+        if seg_len < min_silence_len: return (0, seg_len)
+
+        dtype = np.int8 if audio.sample_width == 1 else np.int16
+        samples = np.frombuffer(audio.raw_data, dtype=dtype).astype(np.int64)
+        squares = np.concatenate(([0], np.cumsum(samples * samples)))
+        n_frames = len(samples) // audio.channels
+
+        # Window i covers milliseconds [i, i + min_silence_len), converted to frames the way pydub slices
+        starts = np.arange(seg_len - min_silence_len + 1)
+        per_ms = audio.frame_rate / 1000.0
+        first = np.floor(starts * per_ms).astype(np.int64)
+        last = np.floor((starts + min_silence_len) * per_ms).astype(np.int64)
+        available = np.minimum(last, n_frames)
+        total = (squares[available * audio.channels] - squares[np.minimum(first, n_frames) * audio.channels]).astype(np.float64)
+        # Short windows at the very end are padded with silence, which counts towards the length
+        count = np.where(available > first, (last - first) * audio.channels, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rms = np.where(count > 0, np.floor(np.sqrt(total / np.maximum(count, 1))), 0)
+        silent = np.flatnonzero(rms <= db_to_float(silence_thresh) * audio.max_possible_amplitude)
+        if len(silent) == 0: return (0, seg_len)
+
+        # Silent windows further apart than the window length start a new silent range
+        gaps = np.flatnonzero(np.diff(silent) > min_silence_len)
+        first_end = int(silent[gaps[0]] if len(gaps) else silent[-1]) + min_silence_len
+        last_start = int(silent[gaps[-1] + 1] if len(gaps) else silent[0])
+        leading = silent[0] == 0
+        trailing = (int(silent[-1]) + min_silence_len) == seg_len
+        if leading and trailing and not len(gaps): return None
+        return (first_end if leading else 0, last_start if trailing else seg_len)
+
+    @staticmethod
+    def load_pcm(word: str, type_code: int, check_expiry: bool = True) -> Optional[bytes]:
+        return shared_cache().get(word, type_code, KIND_PCM, check_expiry)
+
+    @staticmethod
+    def save_pcm(word: str, type_code: int, pcm: bytes) -> bool:
+        return shared_cache().put(word, type_code, pcm, KIND_PCM)
+
+    @staticmethod
+    def fetch_task(word: str, type_code: int):
+        cache = shared_cache()
+
+        # Cache Hit
+        data = cache.get(word, type_code)
+        if data: return 200, data, True
+
+        # Network
+        url = f"{ratelimit.endpoint_url(ratelimit.DICTVOICE)}?audio={requests.utils.quote(word)}&type={type_code}"
+        bucket = ratelimit.get_bucket(ratelimit.DICTVOICE)
+        bucket.acquire()
+        try:
+            r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=5)
+            if r.status_code in (403, 429):
+                bucket.pause(2)
+            if r.status_code == 200 and r.content:
+                cache.put(word, type_code, r.content)
+                return 200, r.content, False
+            return r.status_code, None, False
+        except:
+            return -1, None, False
+
+    @staticmethod
+    def has_ffmpeg() -> bool:
+        return shutil.which("ffmpeg") is not None
+
+    @staticmethod
+    def ffmpeg_encode(wav_path, out_path):
+        cmd = ["ffmpeg", "-y", "-i", str(wav_path), "-acodec", "libmp3lame", "-q:a", "2", str(out_path)]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **_subprocess_kwargs())
+
+def fetch_clip(word: str, type_code: int):
+    """Trimmed PCM from the cache if present, otherwise the MP3. Returns (code, data, cached, decoded)."""
+    pcm = AudioUtils.load_pcm(word, type_code)
+    if pcm is not None: return 200, pcm, True, True
+    code, data, cached = AudioUtils.fetch_task(word, type_code)
+    return code, data, cached, False
+
+def decode_clip(data: bytes) -> Optional[bytes]:
+    """Decode an MP3 clip to normalized PCM and trim its silence. Runs in a worker process."""
+    try:
+        seg = AudioSegment.from_mp3(io.BytesIO(data))
+        seg = seg.set_frame_rate(SAMPLE_RATE).set_channels(CHANNELS).set_sample_width(SAMPLE_WIDTH)
+        return AudioUtils.trim_silence(seg).raw_data
+    except Exception:
+        return None
+
+def pcm_to_segment(pcm: bytes) -> AudioSegment:
+    return AudioSegment(data=pcm, sample_width=SAMPLE_WIDTH, frame_rate=SAMPLE_RATE, channels=CHANNELS)
+
+class PcmAssembler:
+    """Writes clips and the silence between them straight to a PCM sink, in output order.
+
+    Nothing is accumulated in memory, so the cost is linear in the output length. Gaps
+    follow tool_mix's interval settings: a fixed number of seconds, or a multiple of
+    the preceding clip's length.
+    """
+    def __init__(self, write: Callable[[bytes], object], interval_mode: str = 'fixed',
+                 fix_val: float = 0.5, rate_val: float = 0.6):
+        self.write = write
+        self.interval_mode = interval_mode
+        self.fix_val = fix_val
+        self.rate_val = rate_val
+        self.frames = 0
+        self._silence: Dict[int, bytes] = {}
+
+    def gap_frames(self, clip: bytes) -> int:
+        # Same rounding as AudioSegment.silent(duration=int(ms)) after a clip of len(seg) ms
+        clip_ms = round(1000 * (len(clip) // (SAMPLE_WIDTH * CHANNELS)) / SAMPLE_RATE)
+        ms = self.fix_val * 1000 if self.interval_mode == 'fixed' else clip_ms * self.rate_val
+        return int(SAMPLE_RATE * (int(ms) / 1000.0))
+
+    def silence(self, frames: int) -> bytes:
+        if frames not in self._silence:
+            self._silence[frames] = bytes(frames * SAMPLE_WIDTH * CHANNELS)
+        return self._silence[frames]
+
+    def add_word(self, clips: List[bytes], last: bool = False) -> None:
+        """Append one word's clips, each followed by a gap unless it ends the whole output."""
+        for i, clip in enumerate(clips):
+            self.write(clip)
+            self.frames += len(clip) // (SAMPLE_WIDTH * CHANNELS)
+            if last and i == len(clips) - 1: break
+            gap = self.gap_frames(clip)
+            if gap:
+                self.write(self.silence(gap))
+                self.frames += gap
+
+    def duration(self) -> float:
+        return self.frames / SAMPLE_RATE
+
+class FfmpegEncoder:
+    """A single ffmpeg process encoding raw PCM from stdin to MP3 while clips are still arriving.
+
+    Output goes to a sibling temporary file that replaces `out_path` on `close()`, so
+    a cancelled run never leaves a truncated MP3 behind.
+    """
+    def __init__(self, out_path):
+        self.out_path = Path(out_path)
+        self.tmp_path = self.out_path.with_name(f".{self.out_path.name}.part")
+        cmd = ["ffmpeg", "-y", "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", str(CHANNELS), "-i", "pipe:0",
+               "-acodec", "libmp3lame", "-q:a", "2", "-f", "mp3", str(self.tmp_path)]
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                     stderr=subprocess.DEVNULL, **_subprocess_kwargs())
+
+    def write(self, data: bytes) -> None:
+        self.proc.stdin.write(data) # Blocks while ffmpeg catches up
+
+    def close(self) -> None:
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            self.tmp_path.unlink(missing_ok=True)
+            raise subprocess.CalledProcessError(self.proc.returncode, "ffmpeg")
+        os.replace(self.tmp_path, self.out_path)
+
+    def abort(self) -> None:
+        try: self.proc.stdin.close()
+        except OSError: pass
+        self.proc.kill()
+        self.proc.wait()
+        self.tmp_path.unlink(missing_ok=True)
+
+class Mp3Output:
+    """Destination for assembled PCM: streamed into ffmpeg, or spooled to a WAV file and encoded on close."""
+    def __init__(self, out_path, stream: bool = True):
+        self.out_path = Path(out_path)
+        self.encoder: Optional[FfmpegEncoder] = None
+        self.spool: Optional[Path] = None
+        if stream and AudioUtils.has_ffmpeg():
+            self.encoder = FfmpegEncoder(self.out_path)
+            self.write = self.encoder.write
+        else:
+            fd, spool_name = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            self.spool = Path(spool_name)
+            self.wav = wave.open(spool_name, 'wb')
+            self.wav.setnchannels(CHANNELS)
+            self.wav.setsampwidth(SAMPLE_WIDTH)
+            self.wav.setframerate(SAMPLE_RATE)
+            self.write = self.wav.writeframesraw
+
+    @property
+    def streaming(self) -> bool:
+        return self.encoder is not None
+
+    def close(self) -> None:
+        if self.encoder:
+            self.encoder.close()
+            return
+        self.wav.close()
+        try:
+            if AudioUtils.has_ffmpeg():
+                AudioUtils.ffmpeg_encode(self.spool, self.out_path)
+            else:
+                logger.warning("ffmpeg not found, falling back to pydub export (slow)")
+                AudioSegment.from_wav(self.spool).export(self.out_path, format="mp3")
+        finally:
+            self.spool.unlink(missing_ok=True)
+
+    def abort(self) -> None:
+        if self.encoder:
+            self.encoder.abort()
+            return
+        self.wav.close()
+        self.spool.unlink(missing_ok=True)
+
+# Result of one voice of one word: (status code, trimmed PCM or None, served from cache)
+ClipResult = Tuple[int, Optional[bytes], bool]
+
+class ClipPipeline:
+    """Staged audio pipeline: download (threads) -> decode + trim (processes) -> ordered delivery.
+
+    Each stage hands its output to the next from a completion callback, and the consumer
+    blocks on a queue, so nothing polls. At most `window` words are in flight at once;
+    the window can be changed while running, e.g. to back off after a 429.
+    """
+    def __init__(self, words: List[str], voices: List[str], fetch_threads: int = 32,
+                 decode_workers: Optional[int] = None, window: int = 50,
+                 on_rate_limit: Optional[Callable[[str], None]] = None):
+        self.words = words
+        self.voices = voices
+        self.fetch_threads = fetch_threads
+        self.decode_workers = decode_workers or os.cpu_count() or 1
+        self.window = window
+        self.on_rate_limit = on_rate_limit
+        self._done: "queue.Queue[Optional[Tuple[int, str, ClipResult]]]" = queue.Queue()
+        self.stored: Dict[Tuple[int, str], bool] = {}
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._done.put(None) # Wake the consumer up
+
+    def _submit(self, index: int, fetcher: ThreadPoolExecutor, decoder: ProcessPoolExecutor) -> None:
+        word = self.words[index]
+        for voice in self.voices:
+            try:
+                future = fetcher.submit(fetch_clip, word, VOICE_CODES[voice])
+            except RuntimeError: # Pool already shut down after cancellation
+                self._done.put((index, voice, (-1, None, False)))
+                continue
+            future.add_done_callback(lambda f, v=voice: self._on_fetched(index, v, f, decoder))
+
+    # Exceptions raised in done-callbacks are only logged by concurrent.futures, so each callback
+    # queues exactly one result in `finally`; otherwise run() would wait for it forever.
+
+    def _on_fetched(self, index: int, voice: str, future: Future, decoder: ProcessPoolExecutor) -> None:
+        result: Optional[ClipResult] = (-1, None, False)
+        try:
+            try:
+                code, data, cached, decoded = future.result()
+            except Exception:
+                code, data, cached, decoded = -1, None, False, False
+            result = (code, None, cached)
+            if code == 429 and not cached and self.on_rate_limit:
+                self.on_rate_limit(self.words[index])
+            if decoded: # PCM cache hit, nothing left to do
+                self.stored[(index, voice)] = True
+                result = (code, data, cached)
+                return
+            if code != 200 or not data or self._cancelled.is_set():
+                return
+            try:
+                decoding = decoder.submit(decode_clip, data)
+            except RuntimeError: # Pool already shut down after cancellation
+                return
+            decoding.add_done_callback(lambda f: self._on_decoded(index, voice, code, cached, f))
+            result = None # _on_decoded delivers it
+        finally:
+            if result is not None:
+                self._done.put((index, voice, result))
+
+    def _on_decoded(self, index: int, voice: str, code: int, cached: bool, future: Future) -> None:
+        pcm = None
+        try:
+            try:
+                pcm = future.result()
+            except Exception:
+                pcm = None
+            # The cache index is only written from this process
+            self.stored[(index, voice)] = pcm is not None and AudioUtils.save_pcm(self.words[index], VOICE_CODES[voice], pcm)
+        finally:
+            self._done.put((index, voice, (code, pcm, cached)))
+
+    def run(self) -> Iterator[Tuple[int, str, Dict[str, ClipResult]]]:
+        """Yield (index, word, {voice: result}) strictly in input order."""
+        total = len(self.words)
+        pending: Dict[int, Dict[str, ClipResult]] = {}
+        submitted = 0
+        delivered = 0
+
+        fetcher = ThreadPoolExecutor(max_workers=self.fetch_threads)
+        # Workers start from a done-callback while fetch threads and the cache connection are live, so never fork
+        decoder = ProcessPoolExecutor(max_workers=self.decode_workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            while delivered < total:
+                # Keep the window full
+                while submitted < total and submitted - delivered < max(1, self.window):
+                    if not self.words[submitted] or not self.voices:
+                        pending[submitted] = {}
+                    else:
+                        self._submit(submitted, fetcher, decoder)
+                    submitted += 1
+
+                # Deliver everything that is ready at the head of the line
+                while delivered in pending and len(pending[delivered]) == (len(self.voices) if self.words[delivered] else 0):
+                    yield delivered, self.words[delivered], pending.pop(delivered)
+                    delivered += 1
+                if delivered >= total or submitted - delivered < max(1, self.window) and submitted < total:
+                    continue
+
+                event = self._done.get()
+                if event is None or self._cancelled.is_set():
+                    return
+                index, voice, result = event
+                pending.setdefault(index, {})[voice] = result
+        finally:
+            self._cancelled.set()
+            fetcher.shutdown(wait=False, cancel_futures=True)
+            decoder.shutdown(wait=False, cancel_futures=True)
+
+class BuildError(Exception):
+    pass
+
+def _log(level: str, msg: str) -> None:
+    logger.log(logging.WARNING if level in ("warning", "error") else logging.INFO, msg)
+
+def voices_for(cfg: Dict[str, Any]) -> List[str]:
+    keys = [k for k in ('uk', 'us') if cfg.get(k)]
+    return keys or ['us']
+
+class ThreadBudget:
+    """tool_mix's 429 back-off: halve the thread budget on a 429, grow it again after 5 quiet seconds.
+
+    The budget drives how many words an attached ClipPipeline keeps in flight.
+    """
+    def __init__(self, max_threads: int, on_log: Callable[[str, str], None] = _log,
+                 on_threads: Optional[Callable[[int], None]] = None):
+        self.max_th = self.curr_th = max_threads
+        self.on_log = on_log
+        self.on_threads = on_threads or (lambda n: None)
+        self.lock = threading.Lock()
+        self.last_change = time.time()
+        self.pipeline: Optional[ClipPipeline] = None
+
+    @property
+    def window(self) -> int:
+        return min(50, self.curr_th * 2)
+
+    def set_threads(self, n: int) -> None:
+        self.curr_th = n
+        self.last_change = time.time()
+        if self.pipeline: self.pipeline.window = self.window
+        self.on_threads(n)
+
+    def on_rate_limit(self, word: str) -> None:
+        with self.lock:
+            self.on_log("warning", f"⚠️ 429 限流: {word} - 正在避让")
+            self.set_threads(max(1, self.curr_th // 2))
+
+    def recover(self) -> None:
+        with self.lock:
+            if self.curr_th < self.max_th and (time.time() - self.last_change > 5):
+                self.set_threads(min(int(self.curr_th * 1.5) + 1, self.max_th))
+                self.on_log("success", f"📈 网络稳定，线程恢复至 {self.curr_th}")
+
+    def pipeline_for(self, words: List[str], voices: List[str]) -> "ClipPipeline":
+        self.pipeline = ClipPipeline(words, voices, window=self.window, on_rate_limit=self.on_rate_limit)
+        return self.pipeline
+
+class AudioBuild:
+    """Builds one MP3 from one vocabulary file without any GUI.
+
+    tool_mix's PipelineWorker and the command line both drive this class. Progress, log
+    lines and thread budget changes are reported through optional callbacks.
+    """
+    def __init__(self, json_path, out_path, cfg: Optional[Dict[str, Any]] = None,
+                 on_progress: Optional[Callable[[int, int, str], None]] = None,
+                 on_log: Optional[Callable[[str, str], None]] = None,
+                 on_threads: Optional[Callable[[int], None]] = None):
+        self.json_path = Path(json_path)
+        self.out_path = Path(out_path)
+        self.cfg = {**DEFAULT_CONFIG, **(cfg or {})}
+        self.on_progress = on_progress or (lambda done, total, text: None)
+        self.on_log = on_log or _log
+        self.on_threads = on_threads or (lambda n: None)
+        self.pipeline: Optional[ClipPipeline] = None
+        self.budget = ThreadBudget(self.cfg['max_threads'], self.on_log, self.on_threads)
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        if self.pipeline: self.pipeline.cancel()
+
+    def load_words(self) -> List[str]:
+        with vocab_io.VocabReader(self.json_path) as reader:
+            return [item.get("value", "") for item in reader]
+
+    def run(self) -> float:
+        """Build the MP3 and return its duration in seconds. Raises BuildError on failure or cancel."""
+        words = self.load_words()
+        if not words: raise BuildError("JSON 文件中未找到单词列表")
+        total = len(words)
+        keys = voices_for(self.cfg)
+
+        self.pipeline = self.budget.pipeline_for(words, keys)
+        if self.cancelled: self.pipeline.cancel()
+
+        output = Mp3Output(self.out_path, self.cfg['stream'])
+        if output.streaming: self.on_log("info", "🎬 FFmpeg 流式编码已启动")
+        assembler = PcmAssembler(output.write, self.cfg['interval_mode'], self.cfg['fix_val'], self.cfg['rate_val'])
+        self.on_log("info", f"🚀 开始任务，共 {total} 个单词")
+
+        try:
+            for processed, w_txt, results in self.pipeline.run():
+                self.budget.recover()
+                clips = [results[k][1] for k in keys if k in results and results[k][1]]
+                assembler.add_word(clips, last=(processed == total-1))
+
+                processed += 1
+                if processed % 5 == 0 or processed == total:
+                    self.on_progress(processed, total, f"处理中: {w_txt}")
+
+            if self.cancelled: raise BuildError("操作已取消")
+            if not assembler.frames: raise BuildError("未生成有效音频")
+
+            self.on_progress(total, total, "最终编码合并中...")
+            if not output.streaming:
+                self.on_log("info", f"🎬 正在调用 FFmpeg 编码 {assembler.duration():.0f} 秒音频...")
+            output.close()
+        except BaseException:
+            output.abort()
+            raise
+        return assembler.duration()
+
+def assemble_file(words: List[str], out_path, cfg: Dict[str, Any],
+                  clip: Callable[[str, str], Optional[bytes]]) -> float:
+    """Write one MP3 from clips that are already available, e.g. in a ClipPool. Returns its duration."""
+    keys = voices_for(cfg)
+    output = Mp3Output(out_path, cfg['stream'])
+    assembler = PcmAssembler(output.write, cfg['interval_mode'], cfg['fix_val'], cfg['rate_val'])
+    try:
+        for i, word in enumerate(words):
+            # None only for clips the word has no audio for; a pooled clip that got lost raises
+            clips = [c for c in (clip(word, k) for k in keys) if c is not None] if word else []
+            assembler.add_word(clips, last=(i == len(words)-1))
+        if not assembler.frames: raise BuildError("未生成有效音频")
+        output.close()
+    except BaseException:
+        output.abort()
+        raise
+    return assembler.duration()
+
+def build(json_path, out_path, cfg: Optional[Dict[str, Any]] = None, **callbacks) -> float:
+    """Build one MP3 from one vocabulary file; see AudioBuild."""
+    return AudioBuild(json_path, out_path, cfg, **callbacks).run()
+
+class ClipPool:
+    """Every unique (word, voice) clip of a batch, fetched and decoded exactly once.
+
+    Decoded clips live in the audio cache on disk, so memory use does not grow with the
+    batch; a clip whose cache write failed is kept in memory instead. Pooled clips are
+    pinned in the cache until `release()`, so eviction during the batch cannot drop them.
+    """
+    def __init__(self, cfg: Optional[Dict[str, Any]] = None):
+        self.cfg = {**DEFAULT_CONFIG, **(cfg or {})}
+        self.available: set = set()
+        self.memory: Dict[Tuple[str, str], bytes] = {}
+
+    def fill(self, words: List[str], on_progress: Optional[Callable[[int, int, str], None]] = None) -> int:
+        """Fetch and decode all given words; returns the number of clips available."""
+        keys = voices_for(self.cfg)
+        unique = [w for w in dict.fromkeys(words) if w]
+        budget = ThreadBudget(self.cfg['max_threads'])
+        pipeline = budget.pipeline_for(unique, keys)
+        for done, word, results in pipeline.run():
+            budget.recover()
+            for voice, (code, pcm, cached) in results.items():
+                if not pcm: continue
+                self.available.add((word, voice))
+                shared_cache().pin(word, VOICE_CODES[voice], KIND_PCM)
+                # Decoded but the cache write failed
+                if not pipeline.stored.get((done, voice)):
+                    self.memory[(word, voice)] = pcm
+            if on_progress: on_progress(done + 1, len(unique), word)
+        return len(self.available)
+
+    def get(self, word: str, voice: str) -> Optional[bytes]:
+        """The clip's PCM, None if the word has no audio for this voice. Raises BuildError if a pooled clip is lost."""
+        key = (word, voice)
+        if key not in self.available: return None
+        if key in self.memory: return self.memory[key]
+        pcm = AudioUtils.load_pcm(word, VOICE_CODES[voice], check_expiry=False)
+        if pcm is None:
+            # Evicted before it was pinned, or removed by another process sharing the cache
+            logger.warning(f"Clip {word!r} ({voice}) left the audio cache, fetching it again")
+            pcm = self.refetch(word, voice)
+        if pcm is None: raise BuildError(f"音频片段丢失: {word} ({voice})")
+        return pcm
+
+    def refetch(self, word: str, voice: str) -> Optional[bytes]:
+        code, data, cached, decoded = fetch_clip(word, VOICE_CODES[voice])
+        if code != 200 or not data: return None
+        pcm = data if decoded else decode_clip(data)
+        if pcm:
+            # Keep it for the other files of the batch rather than trusting the cache again
+            self.memory[(word, voice)] = pcm
+        return pcm or None
+
+    def release(self) -> None:
+        """Unpin every pooled clip."""
+        cache = shared_cache()
+        for word, voice in self.available:
+            cache.unpin(word, VOICE_CODES[voice], KIND_PCM)
+        self.available = set()
+        self.memory.clear()
+
+def batch_inputs(data_dir: Path, categories: Optional[List[str]] = None) -> List[Path]:
+    """Files listed by data/config.json and each category's config.json, optionally filtered by category."""
+    root = json.loads((data_dir / "config.json").read_text(encoding="utf-8"))
+    paths = []
+    for sub in root.get("file", []):
+        if categories and sub not in categories: continue
+        config_path = data_dir / sub / "config.json"
+        if not config_path.exists():
+            logger.warning(f"Config file not found: {config_path}")
+            continue
+        config = json.loads(config_path.read_text(encoding="utf-8"))
+        for name in config.get("file", []):
+            path = data_dir / sub / name
+            if path.exists(): paths.append(path)
+            else: logger.warning(f"File listed in config but not found: {path}")
+    return paths
+
+def batch_output(json_path: Path, data_dir: Path, out_dir: Path) -> Path:
+    """Mirror the data/ layout under out_dir."""
+    try:
+        rel = json_path.resolve().relative_to(data_dir.resolve())
+    except ValueError:
+        rel = Path(json_path.name)
+    return out_dir / rel.with_suffix(".mp3")
+
+def build_batch(json_paths: List[Path], out_paths: List[Path], cfg: Optional[Dict[str, Any]] = None,
+                workers: int = 4, on_progress: Optional[Callable[[int, int, str], None]] = None) -> Dict[Path, Optional[str]]:
+    """Build many MP3s; fetch and decode work scales with unique words, not total list length.
+
+    Returns output path -> None on success or the error message.
+    """
+    cfg = {**DEFAULT_CONFIG, **(cfg or {})}
+    lists = []
+    for path in json_paths:
+        with vocab_io.VocabReader(path) as reader:
+            lists.append([item.get("value", "") for item in reader])
+
+    total_words = sum(len(words) for words in lists)
+    pool = ClipPool(cfg)
+    unique = len({w for words in lists for w in words if w})
+    logger.info(f"{len(json_paths)} files, {total_words} words, {unique} unique words")
+    results: Dict[Path, Optional[str]] = {}
+    try:
+        clips = pool.fill([w for words in lists for w in words], on_progress)
+        logger.info(f"{clips} clips ready, assembling {len(json_paths)} files with {workers} workers")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for words, out_path in zip(lists, out_paths):
+                Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+                futures[executor.submit(assemble_file, words, out_path, cfg, pool.get)] = Path(out_path)
+            for future in as_completed(futures):
+                out_path = futures[future]
+                try:
+                    duration = future.result()
+                    results[out_path] = None
+                    logger.info(f"Saved {duration:.0f}s of audio to {out_path}")
+                except Exception as e:
+                    results[out_path] = str(e)
+                    logger.error(f"{out_path}: {e}")
+    finally:
+        pool.release()
+    return results
+
+def default_output(json_path) -> Path:
+    p = Path(json_path)
+    return p.parent / (p.stem + "_audio.mp3")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="tool_mix", description="Build pronunciation audio for vocabulary JSON files without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p_build = commands.add_parser("build", help="Build one MP3 from one vocabulary file")
+    p_build.add_argument("json", type=Path, help="Vocabulary JSON file")
+    p_build.add_argument("-o", "--output", type=Path, help="Output MP3 (default: <name>_audio.mp3 next to the input)")
+
+    p_batch = commands.add_parser("batch", help="Build an MP3 for every file in data/, fetching each clip once")
+    p_batch.add_argument("files", type=Path, nargs="*", help="Vocabulary files (default: every file listed in data/config.json)")
+    p_batch.add_argument("--data", type=Path, default=Path("data"), help="Data directory (default: %(default)s)")
+    p_batch.add_argument("--category", action="append", help="Only this category from data/config.json; repeatable")
+    p_batch.add_argument("--out-dir", type=Path, default=Path("audio"), help="Output directory, mirroring data/ (default: %(default)s)")
+    p_batch.add_argument("--workers", type=int, default=4, help="Files assembled and encoded at once (default: %(default)s)")
+
+    for p in (p_build, p_batch):
+        add_build_options(p)
+    return parser.parse_args(argv)
+
+def add_build_options(p_build: argparse.ArgumentParser) -> None:
+    p_build.add_argument("--uk", action="store_true", help="Include British pronunciation")
+    p_build.add_argument("--us", action="store_true", help="Include American pronunciation")
+    p_build.add_argument("--jobs", type=int, default=DEFAULT_CONFIG['max_threads'],
+                         help="Concurrent downloads budget (default: %(default)s)")
+    p_build.add_argument("--interval", choices=["fixed", "rate"], default=DEFAULT_CONFIG['interval_mode'],
+                         help="Gap after each clip: fixed seconds, or a multiple of the clip length (default: %(default)s)")
+    p_build.add_argument("--gap", type=float, default=DEFAULT_CONFIG['fix_val'], help="Seconds for --interval fixed (default: %(default)s)")
+    p_build.add_argument("--gap-rate", type=float, default=DEFAULT_CONFIG['rate_val'], help="Multiplier for --interval rate (default: %(default)s)")
+    p_build.add_argument("--no-stream", action="store_true", help="Spool to a WAV file and encode at the end instead of streaming into ffmpeg")
+
+def config_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    # Neither flag means both, like the GUI defaults
+    both = not (args.uk or args.us)
+    return {
+        'uk': args.uk or both, 'us': args.us or both,
+        'max_threads': args.jobs,
+        'interval_mode': args.interval, 'fix_val': args.gap, 'rate_val': args.gap_rate,
+        'stream': not args.no_stream,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = parse_args(argv)
+    cfg = config_from_args(args)
+
+    label = args.json.name if args.command == "build" else "clips"
+    shown = [0]
+    def show(done: int, total: int, text: str) -> None:
+        if total and done != shown[0]:
+            shown[0] = done
+            print(f"\r{label}: {done}/{total} ({done / total * 100:.1f}%)", end="", flush=True)
+            if done == total: print()
+
+    if args.command == "batch":
+        json_paths = args.files or batch_inputs(args.data, args.category)
+        if not json_paths:
+            logger.info("Nothing to build.")
+            return 0
+        out_paths = [batch_output(p, args.data, args.out_dir) for p in json_paths]
+        results = build_batch(json_paths, out_paths, cfg, args.workers, on_progress=show)
+        failed = [p for p, error in results.items() if error]
+        logger.info(f"Built {len(results) - len(failed)}/{len(results)} files into {args.out_dir}")
+        return 1 if failed else 0
+
+    out_path = args.output or default_output(args.json)
+    try:
+        duration = build(args.json, out_path, cfg, on_progress=show)
+    except BuildError as e:
+        logger.error(f"{args.json}: {e}")
+        return 1
+    logger.info(f"Saved {duration:.0f}s of audio to {out_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import youdao_stub
+except ImportError:
+    sys.path.append(str(Path(__file__).parent))
+    import youdao_stub
+from metrics import percentile
+
+ENGINES = ("thread", "async", "audio")
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024 # bytes on macOS, KiB elsewhere
+
+def load_words(files: List[Path], count: int) -> List[str]:
+    """Unique words from vocabulary files, or synthetic ones when no file is given."""
+    if not files:
+        return [f"word{i}" for i in range(count)]
+    import vocab_io
+    words: List[str] = []
+    seen = set()
+    for path in files:
+        with vocab_io.VocabReader(path) as reader:
+            for item in reader:
+                word = item.get("value")
+                if word and word not in seen:
+                    seen.add(word)
+                    words.append(word)
+    return words[:count] if count else words
+
+def run_one(engine: str, limit: int, words: List[str], rps: float) -> Dict[str, Any]:
+    """Run one scenario in this process against YOUDAO_BASE_URL. Called in a fresh child."""
+    import ratelimit
+    import tech
+
+    for endpoint in (ratelimit.JSONAPI, ratelimit.DICTVOICE):
+        ratelimit.configure(endpoint, rps, max(1, int(rps)))
+
+    latencies: List[float] = []
+    errors = 0
+
+    manager = tech.ConcurrencyManager(initial_limit=limit, max_limit=limit)
+    report_success, report_error = manager.report_success, manager.report_error
+
+    def on_success(latency: Optional[float] = None) -> None:
+        if latency is not None:
+            latencies.append(latency)
+        report_success(latency)
+
+    def on_error() -> None:
+        nonlocal errors
+        errors += 1
+        report_error()
+
+    manager.report_success, manager.report_error = on_success, on_error
+
+    failed = False
+    start = time.perf_counter()
+    try:
+        if engine == "thread":
+            # Same client path as tech.action and tool_gui's Worker
+            tech.fetch_words(tech.YoudaoClient(manager, None), words, "bench")
+        elif engine == "async":
+            asyncio.run(tech.fetch_words_async(words, "bench", manager, None))
+        else:
+            errors = run_audio(limit, words, latencies)
+    except SystemExit: # Fatal retry exhaustion, keep the partial numbers
+        failed = True
+    elapsed = time.perf_counter() - start
+
+    return {
+        "engine": engine, "limit": limit, "words": len(words), "seconds": elapsed,
+        "words_per_sec": len(words) / elapsed if elapsed else 0.0,
+        "p50_ms": (percentile(latencies, 50) or 0) * 1000, "p99_ms": (percentile(latencies, 99) or 0) * 1000,
+        "requests": len(latencies) + errors, "errors": errors, "failed": failed,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def run_audio(limit: int, words: List[str], latencies: List[float]) -> int:
+    """tool_mix's download/decode pipeline with an empty, throwaway audio cache."""
+    import audio_engine
+
+    fetch_task = audio_engine.AudioUtils.fetch_task
+    errors = 0
+
+    def timed_fetch(word: str, type_code: int):
+        nonlocal errors
+        started = time.monotonic()
+        result = fetch_task(word, type_code)
+        if result[0] == 200:
+            latencies.append(time.monotonic() - started)
+        else:
+            errors += 1
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_engine._shared_cache = audio_engine.AudioCache(Path(tmp))
+        audio_engine.AudioUtils.fetch_task = staticmethod(timed_fetch)
+        pipeline = audio_engine.ClipPipeline(words, ["uk", "us"], fetch_threads=limit, window=limit)
+        for _ in pipeline.run():
+            pass
+        audio_engine._shared_cache.close()
+    return errors
+
+def spawn(engine: str, limit: int, words_file: Path, rps: float, url: str) -> Dict[str, Any]:
+    """Run a scenario in a child process so its peak RSS is its own."""
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--run-one", engine, str(limit),
+           "--words-file", str(words_file), "--rps", str(rps)]
+    env = dict(os.environ, YOUDAO_BASE_URL=url)
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    lines = [line for line in proc.stdout.replace("\r", "\n").splitlines() if line.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"{engine}/{limit} failed:\n{proc.stderr.strip()}")
+    return json.loads(lines[-1])
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    header = f"{'engine':<7} {'limit':>5} {'words':>6} {'words/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6} {'429s':>5} {'RSS MB':>7}"
+    rows = [header, "-" * len(header)]
+    for r in results:
+        rss = f"{r['peak_rss_mb']:.1f}" if r.get("peak_rss_mb") is not None else "n/a"
+        note = "  (aborted)" if r.get("failed") else ""
+        rows.append(f"{r['engine']:<7} {r['limit']:>5} {r['words']:>6} {r['words_per_sec']:>9.1f} "
+                    f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>6} {r.get('rate_limited', 0):>5} {rss:>7}{note}")
+    return "\n".join(rows)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="End-to-end throughput of the fetch engines against a local Youdao stand-in")
+    parser.add_argument("files", nargs="*", type=Path, help="Vocabulary JSON files to take words from (default: synthetic words)")
+    parser.add_argument("--count", type=int, default=500, help="Number of words, 0 for all words of the files (default: 500)")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="Comma separated engines: thread, async, audio (default: all)")
+    parser.add_argument("--limits", default="8,32,128", help="Comma separated concurrency limits (default: 8,32,128)")
+    parser.add_argument("--rps", type=float, default=1000, help="Token bucket rate for both endpoints (default: 1000)")
+    parser.add_argument("--url", help="Benchmark an already running stand-in (youdao_stub.py) instead of starting one")
+    parser.add_argument("--json", type=Path, help="Also write the results to this JSON file")
+    parser.add_argument("--run-one", nargs=2, metavar=("ENGINE", "LIMIT"), help=argparse.SUPPRESS)
+    parser.add_argument("--words-file", type=Path, help=argparse.SUPPRESS)
+    youdao_stub.add_behaviour_args(parser)
+    args = parser.parse_args()
+
+    if args.run_one:
+        words = json.loads(args.words_file.read_text(encoding="utf-8"))
+        result = run_one(args.run_one[0], int(args.run_one[1]), words, args.rps)
+        print("\n" + json.dumps(result))
+        return 0
+
+    engines = [e for e in args.engines.split(",") if e]
+    unknown = set(engines) - set(ENGINES)
+    if unknown:
+        parser.error(f"unknown engine(s): {', '.join(sorted(unknown))}")
+    limits = [int(n) for n in args.limits.split(",") if n]
+    words = load_words(args.files, args.count)
+
+    server = None
+    url = args.url
+    if url is None:
+        server = youdao_stub.StubServer(youdao_stub.behaviour_from_args(args),
+                                        youdao_stub.Recordings(args.record_db, args.audio_cache))
+        server.start()
+        url = server.url
+    print(f"{len(words)} words against {url}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        words_file = Path(tmp) / "words.json"
+        words_file.write_text(json.dumps(words), encoding="utf-8")
+        for engine in engines:
+            for limit in limits:
+                before = dict(server.behaviour.counts) if server else {}
+                result = spawn(engine, limit, words_file, args.rps, url)
+                if server:
+                    result["rate_limited"] = server.behaviour.counts.get(429, 0) - before.get(429, 0)
+                results.append(result)
+                print(f"  {engine}/{limit}: {result['words_per_sec']:.1f} words/s")
+
+    if server:
+        server.shutdown()
+        server.server_close()
+
+    print(format_table(results))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
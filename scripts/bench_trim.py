@@ -0,0 +1,70 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+try:
+    import audio_engine
+except ImportError:
+    sys.path.append(str(Path(__file__).parent))
+    import audio_engine
+
+from pydub import AudioSegment
+from pydub.silence import detect_nonsilent
+
+def synthetic_clips(count: int, seed: int = 0):
+    """Word-like clips: a few noise bursts with quiet, slightly noisy padding around them."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        frames = []
+        for part in range(rng.randint(1, 4)):
+            quiet = rng.randint(0, 400) * audio_engine.SAMPLE_RATE // 1000
+            loud = rng.randint(30, 500) * audio_engine.SAMPLE_RATE // 1000
+            frames.extend(rng.randint(-60, 60) for _ in range(quiet))
+            amp = rng.choice([300, 3000, 20000])
+            frames.extend(rng.randint(-amp, amp) for _ in range(loud))
+        frames.extend(rng.randint(-60, 60) for _ in range(rng.randint(0, 400) * audio_engine.SAMPLE_RATE // 1000))
+        data = b"".join(int(f).to_bytes(2, "little", signed=True) for f in frames)
+        yield audio_engine.pcm_to_segment(data)
+
+def cached_clips(root: Path):
+    """Trimmed PCM clips from the audio cache."""
+    cache = audio_engine.AudioCache(root)
+    with cache.lock:
+        rows = cache.conn.execute("SELECT DISTINCT hash FROM clips WHERE kind = ?", (audio_engine.KIND_PCM,)).fetchall()
+    for (digest,) in rows:
+        yield audio_engine.pcm_to_segment(cache.blob_path(digest).read_bytes())
+
+def pydub_bounds(audio: AudioSegment):
+    ranges = detect_nonsilent(audio, min_silence_len=audio_engine.TRIM_MIN_SILENCE_LEN,
+                              silence_thresh=audio_engine.TRIM_SILENCE_THRESH)
+    return (ranges[0][0], ranges[-1][1]) if ranges else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the NumPy silence trimmer with pydub's detect_nonsilent")
+    parser.add_argument("--clips", type=int, default=2000, help="Number of synthetic clips (default: 2000)")
+    parser.add_argument("--dir", type=Path, help="Use the PCM clips of the audio cache at this path instead, e.g. cache/audio")
+    args = parser.parse_args()
+
+    if audio_engine.np is None:
+        print("NumPy is not installed, nothing to compare.")
+        return 1
+
+    clips = list(cached_clips(args.dir) if args.dir else synthetic_clips(args.clips))
+    print(f"{len(clips)} clips, {sum(len(c) for c in clips) / 1000:.1f}s of audio")
+
+    start = time.perf_counter()
+    expected = [pydub_bounds(c) for c in clips]
+    slow = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [audio_engine.AudioUtils.nonsilent_bounds(c) for c in clips]
+    fast = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(expected, actual) if a != b)
+    print(f"pydub: {slow:.2f}s  numpy: {fast:.2f}s  speedup: {slow / fast:.1f}x  mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
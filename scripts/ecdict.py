@@ -0,0 +1,122 @@
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DB_PATH = BASE_DIR / "data" / "ecdict.db"
+
+CHUNK_SIZE = 500 # Stay well below SQLite's host parameter limit
+MMAP_SIZE = 256 * 1024 * 1024
+
+def new_item(word: str) -> Dict[str, Any]:
+    """Default, empty wordList item."""
+    return {
+        "value": word,
+        "usphone": "",
+        "ukphone": "",
+        "definition": "",
+        "translation": "",
+        "pos": "",
+        "collins": 0,
+        "oxford": False,
+        "tag": "",
+        "bnc": 0,
+        "frq": 0,
+        "exchange": "",
+        "externalCaptions": [],
+        "captions": []
+    }
+
+def apply_row(item: Dict[str, Any], row: Optional[Tuple[Any, ...]]) -> None:
+    """Fill a wordList item from an ecdict row."""
+    if not row:
+        return
+
+    # Mapping based on DB schema
+    # word, british_phonetic, american_phonetic, definition, translation, pos, collins, oxford, tag, bnc, frq, exchange
+    if row[2]: item["usphone"] = f"/{row[2]}/"
+    if row[1]: item["ukphone"] = f"/{row[1]}/"
+    if row[3]: item["definition"] = row[3]
+    if row[4]: item["translation"] = row[4]
+    if row[5]: item["pos"] = row[5]
+
+    try:
+        item["collins"] = int(row[6]) if row[6] else 0
+    except: pass
+
+    try:
+        item["oxford"] = bool(int(row[7])) if row[7] else False
+    except: pass
+
+    if row[8]: item["tag"] = row[8]
+    try:
+        item["bnc"] = int(row[9]) if row[9] else 0
+    except: pass
+    try:
+        item["frq"] = int(row[10]) if row[10] else 0
+    except: pass
+    if row[11]: item["exchange"] = row[11]
+
+class EcdictLookup:
+    """Batched lookups against data/ecdict.db over one long-lived, read-only, mmap'd connection."""
+    _shared: Dict[Path, "EcdictLookup"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path or DB_PATH)
+        self.lock = threading.Lock()
+        self.ensure_index()
+        self.conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+
+    @classmethod
+    def shared(cls, db_path: Optional[Path] = None) -> "EcdictLookup":
+        """One open connection per database for the whole process."""
+        key = Path(db_path or DB_PATH).resolve()
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(key)
+            return cls._shared[key]
+
+    def ensure_index(self) -> None:
+        """Make sure `word` is indexed, creating the index once if the database lacks it."""
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            for index in conn.execute("PRAGMA index_list(ecdict)").fetchall():
+                columns = [info[2] for info in conn.execute(f"PRAGMA index_info('{index[1]}')").fetchall()]
+                if columns and columns[0] == "word":
+                    return
+            logger.info(f"Creating index on ecdict(word) in {self.db_path}, this only happens once...")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ecdict_word ON ecdict(word)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def lookup_many(self, words: Iterable[str]) -> Dict[str, Tuple[Any, ...]]:
+        """Return word -> row for every word found, using chunked `IN (...)` queries.
+
+        Rows are keyed by the word as it was asked for: `word` compares NOCASE in ECDICT,
+        so "Mars" may come back spelled "mars". A row spelled exactly like the request wins.
+        """
+        unique: List[str] = list(dict.fromkeys(words))
+        requested: Dict[str, List[str]] = {}
+        for word in unique:
+            requested.setdefault(word.lower(), []).append(word)
+        rows: Dict[str, Tuple[Any, ...]] = {}
+        with self.lock:
+            for start in range(0, len(unique), CHUNK_SIZE):
+                chunk = unique[start:start + CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                for row in self.conn.execute(f"SELECT * FROM ecdict WHERE word IN ({placeholders})", chunk):
+                    for word in requested.get(str(row[0]).lower(), ()):
+                        if word not in rows or row[0] == word:
+                            rows[word] = row
+        return rows
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
@@ -1,8 +1,13 @@
 
-import json
 import sys
 from pathlib import Path
 
+try:
+    from vocab_io import VocabReader, rewrite
+except ImportError:
+    sys.path.append(str(Path(__file__).parent))
+    from vocab_io import VocabReader, rewrite
+
 def fix_json_size(json_path: str):
     """
     Updates the 'size' field in the JSON file to match the length of 'wordList'.
@@ -13,28 +18,25 @@ def fix_json_size(json_path: str):
         return
 
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with VocabReader(path) as reader:
+            old_size = reader.header.get('size')
+            has_list = reader.has_list
+            actual_size = sum(1 for _ in reader)
     except Exception as e:
         print(f"Error reading JSON: {e}")
         return
 
-    if 'wordList' not in data:
+    if not has_list:
         print("Error: 'wordList' not found in JSON.")
         return
 
-    actual_size = len(data['wordList'])
-    old_size = data.get('size')
-
     if actual_size == old_size:
         print(f"Size is already correct ({actual_size}) for {json_path}")
         return
 
-    data['size'] = actual_size
-
     try:
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        # Second streaming pass rewrites the file with the corrected header
+        rewrite(path, lambda item: item, {'size': actual_size})
         print(f"Successfully updated 'size' from {old_size} to {actual_size} in {json_path}")
     except Exception as e:
         print(f"Error writing JSON: {e}")
@@ -1,6 +1,9 @@
+import argparse
 import logging
+import ratelimit
 import tech
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 # Configure logging
 logging.basicConfig(
@@ -9,37 +12,71 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def process_subdirectory(sub_name: str) -> None:
-    """Process a subdirectory based on its config.json."""
+def plan_subdirectory(sub_name: str, include_completed: bool = False) -> Optional[Tuple[Path, Dict[str, Any], List[str]]]:
+    """Read a subdirectory config and list the files that still need processing."""
     sub_path = Path("data") / sub_name
     config_path = sub_path / "config.json"
     
     if not config_path.exists():
         logger.error(f"Config file not found: {config_path}")
-        return
+        return None
 
     config = tech.load_json(config_path)
     display_name = config.get("name", sub_name)
-    logger.info(f"== Processing Category: {display_name} ==")
+    logger.info(f"== Planning Category: {display_name} ==")
     
-    files_to_process = config.get("file", [])
-    completed_files = set(config.get("completed", []))
+    completed_files = set() if include_completed else set(config.get("completed", []))
+    pending = []
     
-    for file_name in files_to_process:
+    for file_name in config.get("file", []):
         if file_name not in completed_files:
             file_path = sub_path / file_name
             if file_path.exists():
-                tech.action(str(file_path))
-                completed_files.add(file_name)
+                pending.append(file_name)
             else:
                 logger.warning(f"File listed in config but not found: {file_path}")
-    
-    # Update and save config
+
+    return config_path, config, pending
+
+def mark_completed(config_path: Path, config: Dict[str, Any], file_names: List[str]) -> None:
+    """Update and save a subdirectory config after its files were processed."""
+    completed_files = set(config.get("completed", []))
+    completed_files.update(file_names)
     config["completed"] = sorted(list(completed_files))
     tech.write_json(config_path, config)
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Enrich vocabulary JSON files listed in data/config.json.")
+    parser.add_argument("--engine", choices=["thread", "async"], default="thread",
+                        help="thread: thread pool + requests (default); async: asyncio + aiohttp")
+    default_rate, default_burst = ratelimit.DEFAULT_LIMITS[ratelimit.JSONAPI]
+    parser.add_argument("--rps", type=float, default=default_rate,
+                        help=f"Youdao jsonapi requests per second (default: {default_rate})")
+    parser.add_argument("--burst", type=int, default=default_burst,
+                        help=f"Youdao jsonapi burst size (default: {default_burst})")
+    parser.add_argument("--refresh", choices=tech.POLICIES, default=tech.POLICY_MISSING,
+                        help="missing: only fetch items with empty fields (default); "
+                             "stale: also refetch items fetched more than --max-age-days ago; force: refetch everything")
+    parser.add_argument("--max-age-days", type=float, default=tech.MAX_AGE_DAYS,
+                        help=f"Age after which --refresh stale refetches an item; ages come from the response "
+                             f"cache, so at most its TTL of {tech.MAX_AGE_DAYS:g} days (default: %(default)g)")
+    parser.add_argument("--source", choices=tech.SOURCES, default=tech.SOURCE_YOUDAO,
+                        help="youdao: network only (default); ecdict-first: data/ecdict.db first, "
+                             "Youdao only for words it lacks; ecdict: data/ecdict.db only, no network")
+    parser.add_argument("--all", action="store_true",
+                        help="Also process files already listed as completed")
+    parser.add_argument("--metrics", type=Path,
+                        help="Append per-request metrics to this JSON-lines file and write a Prometheus "
+                             "text snapshot next to it (same name, .prom)")
+    args = parser.parse_args()
+    if not 0 <= args.max_age_days <= tech.MAX_AGE_DAYS:
+        parser.error(f"--max-age-days must be between 0 and {tech.MAX_AGE_DAYS:g}, the response cache TTL")
+    return args
+
 def main() -> None:
     """Main entry point for the script."""
+    args = parse_args()
+    ratelimit.configure(ratelimit.JSONAPI, args.rps, args.burst)
     root_config_path = Path("data/config.json")
     if not root_config_path.exists():
         logger.error(f"Root config not found: {root_config_path}")
@@ -48,8 +85,25 @@ def main() -> None:
     root_config = tech.load_json(root_config_path)
     subdirectories = root_config.get("file", [])
     
-    for sub in subdirectories:
-        process_subdirectory(sub)
+    # Plan every category first so words shared across files are only fetched once
+    plans = [plan for plan in (plan_subdirectory(sub, args.all) for sub in subdirectories) if plan is not None]
+    file_paths = [config_path.parent / name for config_path, _, pending in plans for name in pending]
+
+    owners = {config_path.parent / name: (config_path, config) for config_path, config, pending in plans for name in pending}
+
+    def file_done(file_path: Path) -> None:
+        # Record each file as soon as it is written, so an interrupted run keeps its progress
+        config_path, config = owners[file_path]
+        mark_completed(config_path, config, [file_path.name])
+
+    if file_paths:
+        tech.action_many(file_paths, args.engine, file_done, args.refresh, args.max_age_days, args.source, args.metrics)
+    else:
+        logger.info("Nothing to process.")
+
+    # Files skipped for having no words are still marked as completed
+    for config_path, config, pending in plans:
+        mark_completed(config_path, config, pending)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,180 @@
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the request latency histogram
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RATE_LIMIT_STATUSES = (403, 429)
+NO_RESPONSE = -1 # Status recorded for timeouts and connection errors
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile, None for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+def _label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+class WordStats:
+    """Everything observed while resolving one word."""
+    def __init__(self):
+        self.cache_hit: Optional[bool] = None # None when the cache was not consulted
+        self.statuses: List[int] = []
+        self.latencies: List[float] = []
+        self.bytes = 0
+
+class RequestMetrics:
+    """Per-request instrumentation of the Youdao clients, shared by the thread and asyncio engines.
+
+    Clients report every cache lookup and every request on the wire; each one is also
+    appended to an optional JSON-lines file. `file_summary()` aggregates the words of one
+    vocabulary file and `prometheus()` renders a text-format snapshot of the whole run.
+    """
+    def __init__(self, jsonl_path: Optional[Path] = None):
+        self.lock = threading.Lock()
+        self.words: Dict[str, WordStats] = {}
+        self.limit: Optional[int] = None
+        self.in_flight: Optional[int] = None
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.started = time.time()
+        self.handle = None
+        if jsonl_path is not None:
+            jsonl_path = Path(jsonl_path)
+            jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+            self.handle = open(jsonl_path, "a", encoding="utf-8", buffering=1) # Line buffered, survives a crash
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        # Called with the lock held
+        if self.handle is not None:
+            self.handle.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def _stats(self, word: str) -> WordStats:
+        stats = self.words.get(word)
+        if stats is None:
+            stats = self.words[word] = WordStats()
+        return stats
+
+    def cache_lookup(self, word: str, hit: bool) -> None:
+        with self.lock:
+            self._stats(word).cache_hit = hit
+            self._emit({"ts": time.time(), "event": "cache", "word": word, "hit": hit})
+
+    def request(self, word: str, attempt: int, status: int, latency: float, size: int,
+                limit: int, in_flight: int) -> None:
+        """One request on the wire: HTTP status (or NO_RESPONSE), seconds, body bytes and limiter state."""
+        with self.lock:
+            stats = self._stats(word)
+            stats.statuses.append(status)
+            stats.latencies.append(latency)
+            stats.bytes += size
+            self.limit, self.in_flight = limit, in_flight
+            self._emit({"ts": time.time(), "event": "request", "word": word, "attempt": attempt,
+                        "status": status, "latency_ms": round(latency * 1000, 2), "bytes": size,
+                        "limit": limit, "in_flight": in_flight})
+
+    def summarize(self, words: Iterable[str]) -> Dict[str, Any]:
+        """Aggregate the counters of the given words."""
+        with self.lock:
+            picked = [self.words[word] for word in words if word in self.words]
+        statuses = [status for stats in picked for status in stats.statuses]
+        latencies = [latency for stats in picked for latency in stats.latencies]
+        hits = sum(1 for stats in picked if stats.cache_hit)
+        lookups = sum(1 for stats in picked if stats.cache_hit is not None)
+        p50, p99 = percentile(latencies, 50), percentile(latencies, 99)
+        return {
+            "words": len(picked),
+            "requests": len(statuses),
+            "retries": sum(max(0, len(stats.statuses) - 1) for stats in picked),
+            "rate_limited": sum(1 for status in statuses if status in RATE_LIMIT_STATUSES),
+            "errors": sum(1 for status in statuses if status != 200 and status not in RATE_LIMIT_STATUSES),
+            "cache_hits": hits,
+            "cache_hit_rate": hits / lookups if lookups else None,
+            "bytes": sum(stats.bytes for stats in picked),
+            "latency_p50_ms": None if p50 is None else round(p50 * 1000, 1),
+            "latency_p99_ms": None if p99 is None else round(p99 * 1000, 1),
+            "latency_total_s": round(sum(latencies), 3),
+        }
+
+    def file_summary(self, name: str, words: Iterable[str]) -> Dict[str, Any]:
+        """Summarize one vocabulary file, log it and record it in the JSON-lines file."""
+        summary = self.summarize(words)
+        hit_rate = "n/a" if summary["cache_hit_rate"] is None else f"{summary['cache_hit_rate']:.0%}"
+        logger.info(f"Metrics {name}: {summary['words']} words, {summary['requests']} requests "
+                    f"({summary['retries']} retries, {summary['rate_limited']} rate limited, {summary['errors']} errors), "
+                    f"cache hit rate {hit_rate}, {summary['bytes'] / 1024:.1f} KiB, "
+                    f"p50 {summary['latency_p50_ms']} ms, p99 {summary['latency_p99_ms']} ms")
+        with self.lock:
+            self.files[name] = summary
+            self._emit({"ts": time.time(), "event": "file", "file": name, **summary})
+        return summary
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format snapshot of the run so far."""
+        with self.lock:
+            words = list(self.words.values())
+            files = dict(self.files)
+            limit, in_flight = self.limit, self.in_flight
+        statuses: Dict[int, int] = {}
+        for stats in words:
+            for status in stats.statuses:
+                statuses[status] = statuses.get(status, 0) + 1
+        latencies = [latency for stats in words for latency in stats.latencies]
+        lookups = [stats.cache_hit for stats in words if stats.cache_hit is not None]
+
+        lines = ["# HELP youdao_requests_total Youdao jsonapi requests by HTTP status (-1: no response).",
+                 "# TYPE youdao_requests_total counter"]
+        lines += [f'youdao_requests_total{{status="{status}"}} {count}' for status, count in sorted(statuses.items())]
+        lines += ["# HELP youdao_retries_total Requests beyond the first attempt for a word.",
+                  "# TYPE youdao_retries_total counter",
+                  f"youdao_retries_total {sum(max(0, len(stats.statuses) - 1) for stats in words)}",
+                  "# HELP youdao_cache_lookups_total Response cache lookups by result.",
+                  "# TYPE youdao_cache_lookups_total counter",
+                  f'youdao_cache_lookups_total{{result="hit"}} {sum(1 for hit in lookups if hit)}',
+                  f'youdao_cache_lookups_total{{result="miss"}} {sum(1 for hit in lookups if not hit)}',
+                  "# HELP youdao_response_bytes_total Response body bytes received.",
+                  "# TYPE youdao_response_bytes_total counter",
+                  f"youdao_response_bytes_total {sum(stats.bytes for stats in words)}",
+                  "# HELP youdao_request_duration_seconds Youdao jsonapi request latency.",
+                  "# TYPE youdao_request_duration_seconds histogram"]
+        for bound in LATENCY_BUCKETS:
+            lines.append(f'youdao_request_duration_seconds_bucket{{le="{bound}"}} {sum(1 for v in latencies if v <= bound)}')
+        lines += [f'youdao_request_duration_seconds_bucket{{le="+Inf"}} {len(latencies)}',
+                  f"youdao_request_duration_seconds_sum {sum(latencies):.6f}",
+                  f"youdao_request_duration_seconds_count {len(latencies)}"]
+        if limit is not None:
+            lines += ["# HELP youdao_concurrency_limit Limit of the adaptive concurrency manager at the last request.",
+                      "# TYPE youdao_concurrency_limit gauge",
+                      f"youdao_concurrency_limit {limit}",
+                      "# HELP youdao_in_flight Requests in flight at the last request.",
+                      "# TYPE youdao_in_flight gauge",
+                      f"youdao_in_flight {in_flight}"]
+        if files:
+            for metric, key, help_text in (("youdao_file_requests", "requests", "Requests made for the words of a file."),
+                                           ("youdao_file_rate_limited", "rate_limited", "Rate limited requests for the words of a file."),
+                                           ("youdao_file_cache_hits", "cache_hits", "Cache hits for the words of a file.")):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+                lines += [f'{metric}{{file="{_label(name)}"}} {summary[key]}' for name, summary in files.items()]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.prometheus(), encoding="utf-8")
+
+    def close(self) -> None:
+        """Record the totals of the run and close the JSON-lines file."""
+        with self.lock:
+            words = list(self.words)
+        summary = self.summarize(words)
+        with self.lock:
+            if self.handle is not None:
+                self._emit({"ts": time.time(), "event": "run", "seconds": round(time.time() - self.started, 3), **summary})
+                self.handle.close()
+                self.handle = None
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Endpoint names used by every Youdao call site
+JSONAPI = "jsonapi"
+DICTVOICE = "dictvoice"
+
+# Youdao host; point it at scripts/youdao_stub.py to run against a local stand-in
+BASE_URL = os.environ.get("YOUDAO_BASE_URL", "https://dict.youdao.com").rstrip("/")
+
+# Requests per second and burst size per endpoint
+DEFAULT_LIMITS: Dict[str, Tuple[float, int]] = {
+    JSONAPI: (20.0, 20),
+    DICTVOICE: (30.0, 30),
+}
+
+class TokenBucket:
+    """Thread-safe token bucket; callers reserve a token and wait until it becomes available."""
+    def __init__(self, rate: float, burst: int):
+        self.lock = threading.Lock()
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def configure(self, rate: float, burst: int) -> None:
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self.burst = burst
+            self.tokens = min(self.tokens, float(burst))
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(float(self.burst), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take one token, going into debt if needed, and return how long to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait, self.paused_until - now)
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for a while, e.g. after a 403/429, so every caller backs off together."""
+        with self.lock:
+            until = time.monotonic() + seconds
+            if until > self.paused_until:
+                self.paused_until = until
+                logger.warning(f"Rate limited. Pausing requests for {seconds:.1f}s")
+
+def endpoint_url(endpoint: str) -> str:
+    return f"{BASE_URL}/{endpoint}"
+
+_buckets: Dict[str, TokenBucket] = {}
+_registry_lock = threading.Lock()
+
+def get_bucket(endpoint: str) -> TokenBucket:
+    """Return the process-wide bucket for an endpoint, creating it from DEFAULT_LIMITS."""
+    with _registry_lock:
+        bucket = _buckets.get(endpoint)
+        if bucket is None:
+            rate, burst = DEFAULT_LIMITS[endpoint]
+            bucket = _buckets[endpoint] = TokenBucket(rate, burst)
+        return bucket
+
+def configure(endpoint: str, rate: float, burst: int) -> None:
+    """Change the rate (requests per second) and burst size of an endpoint's bucket."""
+    get_bucket(endpoint).configure(rate, burst)
@@ -1,14 +1,23 @@
+import asyncio
+import hashlib
 import json
 import logging
+import os
+import sqlite3
 import sys
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import requests
 
+import ecdict
+import metrics
+import ratelimit
+import vocab_io
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -16,90 +25,509 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+BASE_DIR = Path(__file__).resolve().parent.parent
+CACHE_DIR = BASE_DIR / "cache"
+CACHE_DB_PATH = CACHE_DIR / "youdao.db"
+CACHE_TTL = 90 * 24 * 3600 # Youdao entries rarely change, keep them for 90 days
+MAX_AGE_DAYS = CACHE_TTL / (24 * 3600) # Ages are only known through the cache, so this is also the cap for stale
+CACHE_MAX_ENTRIES = 200000
+
+# Refresh policies for action_many
+POLICY_MISSING = "missing" # Only fetch items with empty fields, and only fill those fields
+POLICY_STALE = "stale" # Also refetch items whose cached response is older than max_age_days
+POLICY_FORCE = "force" # Refetch and overwrite every item
+POLICIES = (POLICY_MISSING, POLICY_STALE, POLICY_FORCE)
+REQUIRED_FIELDS = ("usphone", "ukphone", "translation")
+
+# Where action_many gets its data from
+SOURCE_YOUDAO = "youdao" # Youdao only
+SOURCE_ECDICT_FIRST = "ecdict-first" # Local data/ecdict.db, Youdao only for what it lacks
+SOURCE_ECDICT = "ecdict" # Local data/ecdict.db only, no network at all
+SOURCES = (SOURCE_YOUDAO, SOURCE_ECDICT_FIRST, SOURCE_ECDICT)
+ECDICT_FIELDS = ("usphone", "ukphone", "translation", "definition", "pos",
+                 "collins", "oxford", "tag", "bnc", "frq", "exchange")
+
+# The async engine starts moderately and lets AIMD grow towards hundreds of in-flight requests
+ASYNC_INITIAL_IN_FLIGHT = 32
+ASYNC_MAX_IN_FLIGHT = 256
+
+# Words submitted ahead of completion per slot of the limiter, so the pool never idles
+SUBMIT_AHEAD = 2
+
+# Threads rewriting finished files while the remaining words are still being fetched
+REWRITE_WORKERS = min(4, os.cpu_count() or 1)
+
 class ConcurrencyManager:
-    """Manages adaptive thread counts based on error rates."""
-    def __init__(self, initial_limit: int = 8):
-        self.max_limit = initial_limit
+    """Shared, resizable concurrency limiter tuned with AIMD from status codes and latency.
+
+    Use it as a context manager around each request: threads block while `in_flight`
+    has reached `current_limit`, so lowering the limit really lowers throughput.
+    """
+    def __init__(self, initial_limit: int = 8, max_limit: Optional[int] = None, min_limit: int = 1):
+        self.max_limit = max_limit or initial_limit
+        self.min_limit = min_limit
         self.current_limit = initial_limit
+        self.in_flight = 0
         self.success_streak = 0
-        self.lock = threading.Lock()
-        self.semaphore = threading.BoundedSemaphore(initial_limit)
-        self.recovery_threshold = 10 # Increase limit after 10 consecutive successes
+        self.condition = threading.Condition()
+        self.recovery_threshold = 10 # Increase limit after 10 consecutive healthy successes
+        self.decrease_cooldown = 1.0 # Concurrent failures within this window only halve once
+        self.latency_tolerance = 2.0 # Latency above baseline * tolerance counts as congestion
+        self.baseline_drift = 0.01 # Share of the gap the baseline closes per sample when latency rises
+        self.smoothed_latency: Optional[float] = None
+        self.baseline_latency: Optional[float] = None
+        self._last_decrease = 0.0
+
+    def acquire(self) -> None:
+        with self.condition:
+            while self.in_flight >= self.current_limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def __enter__(self) -> "ConcurrencyManager":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
 
     def report_error(self):
-        with self.lock:
-            old_limit = self.current_limit
-            self.current_limit = max(1, self.current_limit // 2)
+        """Multiplicative decrease after a rate limit or failed request."""
+        with self.condition:
             self.success_streak = 0
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_cooldown:
+                return
+            old_limit = self.current_limit
+            self.current_limit = max(self.min_limit, self.current_limit // 2)
+            self._last_decrease = now
             if old_limit != self.current_limit:
                 logger.warning(f"Error detected. Scaling down concurrency: {old_limit} -> {self.current_limit}")
 
-    def report_success(self):
-        with self.lock:
+    def report_success(self, latency: Optional[float] = None):
+        """Additive increase after a streak of successes that did not show rising latency."""
+        with self.condition:
+            if latency is not None:
+                self.smoothed_latency = latency if self.smoothed_latency is None else 0.8 * self.smoothed_latency + 0.2 * latency
+                if self.baseline_latency is None or self.smoothed_latency < self.baseline_latency:
+                    self.baseline_latency = self.smoothed_latency
+                else:
+                    # Follow a lasting shift slowly, so only sudden rises hold the limit back
+                    self.baseline_latency += self.baseline_drift * (self.smoothed_latency - self.baseline_latency)
+                if self.smoothed_latency > self.baseline_latency * self.latency_tolerance:
+                    # Queueing on the server side, hold the current limit
+                    self.success_streak = 0
+                    return
+
             self.success_streak += 1
             if self.success_streak >= self.recovery_threshold and self.current_limit < self.max_limit:
                 self.current_limit += 1
                 self.success_streak = 0
+                self.condition.notify_all()
                 logger.info(f"Stable performance detected. Scaling up concurrency: {self.current_limit}")
 
-    def get_active_semaphore(self):
-        # This is a simplified way to restrict concurrency dynamically
-        return threading.Semaphore(self.current_limit)
+class WordRecord:
+    """The part of a Youdao response the enrichment uses, parsed once at the network edge.
+
+    Phonetics are None when the response has none; `translations` holds the first
+    `l.i` entry of each `trs` item, in order. Entries that are not strings (markup objects)
+    are skipped: the baseline parser failed on them and dropped the whole translation.
+    """
+    __slots__ = ("word", "usphone", "ukphone", "translations")
+
+    def __init__(self, word: str, usphone: Optional[str] = None, ukphone: Optional[str] = None,
+                 translations: Tuple[str, ...] = ()):
+        self.word = word
+        self.usphone = usphone
+        self.ukphone = ukphone
+        self.translations = tuple(translations)
+
+    @classmethod
+    def from_response(cls, word: str, data: Any) -> Optional["WordRecord"]:
+        """Project a raw jsonapi response; None for an empty or malformed one."""
+        if not data:
+            return None
+        try:
+            ec_data = data.get("ec", {}).get("word", [{}])[0]
+            translations = []
+            for tr in ec_data.get("trs", []):
+                l_data = tr.get("tr", [{}])[0].get("l", {}).get("i", [])
+                if l_data and isinstance(l_data[0], str):
+                    translations.append(l_data[0])
+            return cls(word, ec_data.get("usphone"), ec_data.get("ukphone"), translations)
+        except (IndexError, KeyError, TypeError, AttributeError):
+            return None
+
+    @classmethod
+    def from_payload(cls, word: str, payload: Dict[str, Any]) -> Optional["WordRecord"]:
+        """Inverse of to_payload; raw responses cached by older versions are projected instead."""
+        if "tr" not in payload:
+            return cls.from_response(word, payload)
+        return cls(word, payload.get("us"), payload.get("uk"), payload["tr"])
+
+    def to_payload(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"tr": list(self.translations)}
+        if self.usphone is not None:
+            payload["us"] = self.usphone
+        if self.ukphone is not None:
+            payload["uk"] = self.ukphone
+        return payload
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, WordRecord) and all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"WordRecord({self.word!r}, {self.usphone!r}, {self.ukphone!r}, {self.translations!r})"
+
+class ResponseCache:
+    """Persistent SQLite cache of parsed Youdao responses (WordRecord) with TTL and size-based eviction."""
+    EVICT_INTERVAL = 500 # Run an eviction sweep every N insertions
+
+    def __init__(self, db_path: Path = CACHE_DB_PATH, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._inserts = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, word TEXT NOT NULL, payload TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)")
+        self.conn.commit()
+        self.evict()
+
+    @staticmethod
+    def normalize(word: str) -> str:
+        return " ".join(word.split()).lower()
+
+    @classmethod
+    def make_key(cls, word: str, params: Dict[str, Any]) -> str:
+        """Build a stable key from the normalized word and the request params (minus the query itself)."""
+        extra = {k: v for k, v in params.items() if k != "q"}
+        raw = cls.normalize(word) + "\x00" + json.dumps(extra, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, word: str, params: Dict[str, Any]) -> Optional[WordRecord]:
+        key = self.make_key(word, params)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT payload, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            payload = json.loads(row[0])
+            record = WordRecord.from_payload(word, payload)
+            if record is None:
+                self.misses += 1
+                return None
+            if "tr" not in payload:
+                # Shrink a raw response cached by an older version in place
+                self.conn.execute("UPDATE responses SET payload = ? WHERE key = ?", (self.encode(record), key))
+            self.conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+        return record
+
+    def age(self, word: str, params: Dict[str, Any]) -> Optional[float]:
+        """Seconds since the entry was fetched, or None if it is not cached."""
+        with self.lock:
+            row = self.conn.execute("SELECT created FROM responses WHERE key = ?", (self.make_key(word, params),)).fetchone()
+        return None if row is None else time.time() - row[0]
+
+    @staticmethod
+    def encode(record: WordRecord) -> str:
+        return json.dumps(record.to_payload(), ensure_ascii=False, separators=(",", ":"))
+
+    def set(self, word: str, params: Dict[str, Any], record: WordRecord) -> None:
+        key = self.make_key(word, params)
+        payload = self.encode(record)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, word, payload, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, self.normalize(word), payload, now, now)
+            )
+            self.conn.commit()
+            self._inserts += 1
+            run_evict = self._inserts % self.EVICT_INTERVAL == 0
+        if run_evict:
+            self.evict()
+
+    def evict(self) -> None:
+        """Drop expired entries, then the least recently used ones beyond max_entries."""
+        with self.lock:
+            self.conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+            count = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self.conn.commit()
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
 
 class YoudaoClient:
     """Enhanced Client for Youdao Dictionary API with retry logic and adaptive concurrency support."""
-    BASE_URL = "https://dict.youdao.com/jsonapi"
+    BASE_URL = ratelimit.endpoint_url(ratelimit.JSONAPI)
+    PARAMS = {
+        "dicts": json.dumps({"count": 99, "dicts": [["syno", "ec"]]})
+    }
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    }
+    # Retry policy shared by the thread and asyncio engines
+    MAX_RETRIES = 3
+    RATE_LIMIT_STATUSES = (403, 429)
+    TIMEOUT = 10
     
-    def __init__(self, manager: ConcurrencyManager):
+    def __init__(self, manager: ConcurrencyManager, cache: Optional[ResponseCache] = None,
+                 recorder: Optional[metrics.RequestMetrics] = None):
         self.session = requests.Session()
         self.manager = manager
+        self.cache = cache
+        self.recorder = recorder
         # Optimization: Reuse headers
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        })
-        self.params = {
-            "dicts": json.dumps({"count": 99, "dicts": [["syno", "ec"]]})
-        }
-
-    def fetch_word_info(self, word: str) -> Optional[Dict[str, Any]]:
-        """Fetch word information with retries and adaptive concurrency."""
-        max_retries = 3
+        self.session.headers.update(self.HEADERS)
+        self.bucket = ratelimit.get_bucket(ratelimit.JSONAPI)
+        self.params = dict(YoudaoClient.PARAMS)
+
+    def fetch_word_info(self, word: str, refresh: bool = False) -> Optional[WordRecord]:
+        """Fetch word information with retries and adaptive concurrency.
+
+        The response is projected to a WordRecord as soon as it arrives; None when Youdao
+        returned nothing usable. With `refresh`, the cached record is ignored and replaced.
+        """
+        if self.cache is not None and not refresh:
+            cached = self.cache.get(word, self.params)
+            if self.recorder is not None:
+                self.recorder.cache_lookup(word, cached is not None)
+            if cached is not None:
+                return cached
+
+        max_retries = self.MAX_RETRIES
         for attempt in range(1, max_retries + 1):
-            # Dynamic throttling based on current manager limit
-            with self.manager.get_active_semaphore():
+            backoff = 0
+            # Global request budget shared with every other Youdao call site
+            self.bucket.acquire()
+            # Hold a slot of the shared limiter only while the request is on the wire
+            with self.manager:
+                response = None
                 try:
                     params = self.params.copy()
                     params["q"] = word
-                    response = self.session.get(self.BASE_URL, params=params, timeout=10)
-                    
+                    started = time.monotonic()
+                    response = self.session.get(self.BASE_URL, params=params, timeout=self.TIMEOUT)
+                    self.record(word, attempt, response.status_code, started, len(response.content))
+
                     # Typical rate limit check (Youdao might return 403 or 429)
-                    if response.status_code in [403, 429]:
+                    if response.status_code in self.RATE_LIMIT_STATUSES:
                         self.manager.report_error()
-                        time.sleep(2 ** attempt) # Backoff
-                        continue
+                        backoff = 2 ** attempt
+                        self.bucket.pause(backoff)
+                    else:
+                        response.raise_for_status()
+                        data = response.json()
+                        
+                        # Check if it's a valid response or an API-level error
+                        if not data or (isinstance(data, dict) and 'ec' not in data):
+                            # Some words just might not exist, but if it happens too much it might be a block
+                            pass 
 
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    # Check if it's a valid response or an API-level error
-                    if not data or (isinstance(data, dict) and 'ec' not in data):
-                        # Some words just might not exist, but if it happens too much it might be a block
-                        pass 
-
-                    self.manager.report_success()
-                    return data
+                        self.manager.report_success(time.monotonic() - started)
+                        record = WordRecord.from_response(word, data)
+                        if record is not None and self.cache is not None:
+                            self.cache.set(word, self.params, record)
+                        return record
 
                 except (requests.RequestException, json.JSONDecodeError) as e:
                     logger.debug(f"Attempt {attempt} failed for word '{word}': {e}")
+                    if response is None:
+                        self.record(word, attempt, metrics.NO_RESPONSE, started, 0)
                     self.manager.report_error()
                     
                     if attempt == max_retries:
                         logger.error(f"FATAL: Failed to fetch word '{word}' after {max_retries} attempts.")
                         sys.exit(1) # Requirement: Force quit on persistent non-rate-limit errors
                     
-                    time.sleep(1) # Simple retry delay
+                    backoff = 1 # Simple retry delay
+
+            # Back off outside the limiter so waiting retries do not occupy a slot
+            time.sleep(backoff)
+        return None
+
+    def record(self, word: str, attempt: int, status: int, started: float, size: int) -> None:
+        """Report one request to the recorder, if any, together with the limiter state."""
+        if self.recorder is not None:
+            self.recorder.request(word, attempt, status, time.monotonic() - started, size,
+                                  self.manager.current_limit, self.manager.in_flight)
+
+class AsyncLimiter:
+    """asyncio front-end to a ConcurrencyManager, so both engines share one AIMD state."""
+    def __init__(self, manager: ConcurrencyManager):
+        self.manager = manager
+        self.condition = asyncio.Condition()
+
+    def _try_acquire(self) -> bool:
+        with self.manager.condition:
+            if self.manager.in_flight < self.manager.current_limit:
+                self.manager.in_flight += 1
+                return True
+            return False
+
+    async def __aenter__(self) -> "AsyncLimiter":
+        async with self.condition:
+            await self.condition.wait_for(self._try_acquire)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.manager.release()
+        async with self.condition:
+            self.condition.notify_all()
+
+class AsyncYoudaoClient:
+    """asyncio variant of YoudaoClient built on one pooled keep-alive aiohttp session."""
+    def __init__(self, manager: ConcurrencyManager, session: Any, cache: Optional[ResponseCache] = None,
+                 recorder: Optional[metrics.RequestMetrics] = None):
+        self.manager = manager
+        self.limiter = AsyncLimiter(manager)
+        self.bucket = ratelimit.get_bucket(ratelimit.JSONAPI)
+        self.session = session
+        self.cache = cache
+        self.recorder = recorder
+        self.params = dict(YoudaoClient.PARAMS)
+
+    async def fetch_word_info(self, word: str, refresh: bool = False) -> Optional[WordRecord]:
+        """Fetch word information with the same retry policy as YoudaoClient."""
+        import aiohttp
+
+        if self.cache is not None and not refresh:
+            cached = self.cache.get(word, self.params)
+            if self.recorder is not None:
+                self.recorder.cache_lookup(word, cached is not None)
+            if cached is not None:
+                return cached
+
+        max_retries = YoudaoClient.MAX_RETRIES
+        for attempt in range(1, max_retries + 1):
+            backoff = 0
+            await self.bucket.acquire_async()
+            async with self.limiter:
+                received = False
+                try:
+                    params = self.params.copy()
+                    params["q"] = word
+                    started = time.monotonic()
+                    async with self.session.get(YoudaoClient.BASE_URL, params=params) as response:
+                        body = await response.read()
+                        received = True
+                        self.record(word, attempt, response.status, started, len(body))
+                        if response.status in YoudaoClient.RATE_LIMIT_STATUSES:
+                            self.manager.report_error()
+                            backoff = 2 ** attempt
+                            self.bucket.pause(backoff)
+                        else:
+                            response.raise_for_status()
+                            data = json.loads(body)
+
+                            self.manager.report_success(time.monotonic() - started)
+                            record = WordRecord.from_response(word, data)
+                            if record is not None and self.cache is not None:
+                                self.cache.set(word, self.params, record)
+                            return record
+
+                except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError) as e:
+                    logger.debug(f"Attempt {attempt} failed for word '{word}': {e}")
+                    if not received:
+                        self.record(word, attempt, metrics.NO_RESPONSE, started, 0)
+                    self.manager.report_error()
+
+                    if attempt == max_retries:
+                        logger.error(f"FATAL: Failed to fetch word '{word}' after {max_retries} attempts.")
+                        sys.exit(1) # Same policy as the thread engine
+
+                    backoff = 1
+
+            await asyncio.sleep(backoff)
         return None
 
+    def record(self, word: str, attempt: int, status: int, started: float, size: int) -> None:
+        if self.recorder is not None:
+            self.recorder.request(word, attempt, status, time.monotonic() - started, size,
+                                  self.manager.current_limit, self.manager.in_flight)
+
+class WordJournal:
+    """Append-only JSON-lines log of enriched words, kept next to a vocabulary file.
+
+    Each finished word is recorded as soon as it is fetched, so a crashed or killed run
+    can resume without fetching it again. The journal is removed once the file is rewritten.
+    The first line records the run settings (refresh policy, source); a journal written
+    with other settings is discarded instead of replayed.
+    """
+    def __init__(self, file_path: Path, settings: Optional[Dict[str, Any]] = None):
+        self.path = file_path.with_name(f".{file_path.name}.journal")
+        self.settings = settings or {}
+        self.handle = None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Return word -> enriched fields recorded by a previous, interrupted run with the same settings."""
+        entries: Dict[str, Dict[str, Any]] = {}
+        if not self.path.exists():
+            return entries
+        settings = None
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    if "settings" in record:
+                        settings = record["settings"]
+                        continue
+                    entries[record["value"]] = record["fields"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    # A line cut short by the crash, everything before it is still valid
+                    continue
+        if settings != self.settings:
+            logger.info(f"Ignoring {self.path.name}: written by a run with different settings")
+            self.discard()
+            return {}
+        return entries
+
+    def append(self, word: str, fields: Dict[str, Any]) -> None:
+        if self.handle is None:
+            fresh = not self.path.exists() or self.path.stat().st_size == 0
+            self.handle = open(self.path, "a", encoding="utf-8")
+            if fresh:
+                self.handle.write(json.dumps({"settings": self.settings}, ensure_ascii=False) + "\n")
+        self.handle.write(json.dumps({"value": word, "fields": fields}, ensure_ascii=False) + "\n")
+        self.handle.flush()
+
+    def close(self) -> None:
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def discard(self) -> None:
+        self.close()
+        if self.path.exists():
+            os.remove(self.path)
+
 def load_json(file_path: Path) -> Dict[str, Any]:
     """Load JSON data from a file."""
     try:
@@ -110,10 +538,9 @@ def load_json(file_path: Path) -> Dict[str, Any]:
         sys.exit(1)
 
 def write_json(file_path: Path, data: Dict[str, Any]) -> None:
-    """Write data to a JSON file."""
+    """Atomically write data to a JSON file, skipping the write if nothing changed."""
     try:
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        vocab_io.atomic_write_json(file_path, data)
     except Exception as e:
         logger.error(f"Failed to write JSON to {file_path}: {e}")
         sys.exit(1)
@@ -130,76 +557,415 @@ def display_progress(label: str, current: int, total: int, lock: threading.Lock)
         if current == total:
             print()
 
+def apply_word_info(item: Dict[str, Any], record: Optional[WordRecord]) -> None:
+    """Update a word item in place with a parsed Youdao response."""
+    if record is None:
+        return
+
+    # Phonetics
+    if record.usphone is not None:
+        item["usphone"] = f"/{record.usphone}/"
+    if record.ukphone is not None:
+        item["ukphone"] = f"/{record.ukphone}/"
+
+    # Translations
+    if record.translations:
+        item["translation"] = "\n".join(record.translations)
+
+    item["definition"] = ""
+    item["pos"] = ""
+
+def word_fields(record: Optional[WordRecord]) -> Dict[str, Any]:
+    """The fields apply_word_info would set for a record, as a standalone dict."""
+    fields: Dict[str, Any] = {}
+    apply_word_info(fields, record)
+    return fields
+
+def is_complete(item: Dict[str, Any]) -> bool:
+    """Whether every field filled from Youdao already has a value."""
+    return all(item.get(field) for field in REQUIRED_FIELDS)
+
+def merge_fields(item: Dict[str, Any], fields: Dict[str, Any], policy: str) -> None:
+    """Apply enriched fields to an item according to the refresh policy."""
+    if policy == POLICY_MISSING:
+        for field, value in fields.items():
+            if value and not item.get(field):
+                item[field] = value
+    else:
+        item.update(fields)
+
+def ecdict_fields(word: str, row: Any) -> Dict[str, Any]:
+    """The non-empty wordList fields an ecdict row provides."""
+    item = ecdict.new_item(word)
+    ecdict.apply_row(item, row)
+    return {field: item[field] for field in ECDICT_FIELDS if item[field]}
+
 def process_word(client: YoudaoClient, item: Dict[str, Any]) -> None:
     """Process a single word item and update it with info from Youdao."""
     word = item.get("value")
     if not word:
         return
 
-    info = client.fetch_word_info(word)
-    if not info:
-        return
+    apply_word_info(item, client.fetch_word_info(word))
 
-    try:
-        ec_data = info.get("ec", {}).get("word", [{}])[0]
-        
-        # Phonetics
-        if "usphone" in ec_data:
-            item["usphone"] = f"/{ec_data['usphone']}/"
-        if "ukphone" in ec_data:
-            item["ukphone"] = f"/{ec_data['ukphone']}/"
-            
-        # Translations
-        trs = ec_data.get("trs", [])
-        translations = []
-        for tr in trs:
-            l_data = tr.get("tr", [{}])[0].get("l", {}).get("i", [])
-            if l_data:
-                translations.append(l_data[0])
-        
-        if translations:
-            item["translation"] = "\n".join(translations)
-            
-        item["definition"] = ""
-        item["pos"] = ""
-        
-    except (IndexError, KeyError, TypeError):
-        pass
+def rewrite_file(file_path: Path, fields: Dict[str, Dict[str, Any]], policy: str) -> None:
+    """Merge enriched fields into a vocabulary file, streaming item by item. Runs on a rewrite thread."""
+    def enrich(item: Dict[str, Any]) -> Dict[str, Any]:
+        word = (item.get("value") or "").strip()
+        if word in fields:
+            merge_fields(item, fields[word], policy)
+        return item
 
-def action(file_path_str: str) -> None:
-    """Main action for a single JSON file processing using multiple threads."""
-    file_path = Path(file_path_str)
-    data = load_json(file_path)
-    word_list = data.get("wordList", [])
-    total = len(word_list)
-    
-    if total == 0:
-        logger.warning(f"No words found in {file_path}")
-        return
+    vocab_io.rewrite(file_path, enrich)
+
+class FileScheduler:
+    """Rewrites each file on a worker thread as soon as the last of its words is resolved.
+
+    Finished files are written while the words of later files are still on the wire. Threads,
+    not processes: the fetch threads and SQLite connections are live, so forking is unsafe.
+    `on_done(path)` is called from the thread that calls `resolve`/`poll`/`finish`, strictly
+    in plan order, so config updates stay ordered and never race.
+    """
+    def __init__(self, documents: List[Path], fields_for: Callable[[Path], Optional[Dict[str, Dict[str, Any]]]],
+                 policy: str, on_done: Callable[[Path], None], workers: int = REWRITE_WORKERS):
+        self.documents = documents
+        self.fields_for = fields_for # None for files without anything to write
+        self.policy = policy
+        self.on_done = on_done
+        self.executor = ThreadPoolExecutor(max_workers=max(1, min(workers, len(documents))))
+        self.waiting: Dict[Path, int] = {}
+        self.word_files: Dict[str, List[Path]] = {}
+        self.scheduled: Dict[Path, Optional[Future]] = {}
+        self.delivered = 0
+
+    def expect(self, file_path: Path, words: Iterable[str]) -> None:
+        """Register the words a file still waits for; a file waiting for nothing is scheduled at once."""
+        count = 0
+        for word in words:
+            self.word_files.setdefault(word, []).append(file_path)
+            count += 1
+        self.waiting[file_path] = count
+        if count == 0:
+            self._schedule(file_path)
+
+    def resolve(self, word: str) -> None:
+        for file_path in self.word_files.pop(word, []):
+            self.waiting[file_path] -= 1
+            if self.waiting[file_path] == 0:
+                self._schedule(file_path)
+        self.poll()
+
+    def _schedule(self, file_path: Path) -> None:
+        fields = self.fields_for(file_path)
+        self.scheduled[file_path] = None if fields is None else self.executor.submit(rewrite_file, file_path, fields, self.policy)
+
+    def poll(self, wait: bool = False) -> None:
+        """Report finished files at the head of the plan, optionally waiting for all of them."""
+        while self.delivered < len(self.documents):
+            file_path = self.documents[self.delivered]
+            if file_path not in self.scheduled:
+                return
+            future = self.scheduled[file_path]
+            if future is not None:
+                if not wait and not future.done():
+                    return
+                try:
+                    future.result()
+                except (OSError, ValueError) as e:
+                    logger.error(f"Failed to write JSON to {file_path}: {e}")
+                    sys.exit(1)
+            self.delivered += 1
+            self.on_done(file_path)
+
+    def finish(self) -> None:
+        """Write the files still waiting (for words that failed) and report everything."""
+        for file_path in self.documents:
+            if file_path not in self.scheduled:
+                self._schedule(file_path)
+        self.poll(wait=True)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+def bounded_map(executor: Executor, fn: Callable[[Any], Any], items: Iterable[Any], window: int,
+                cancelled: Optional[threading.Event] = None) -> Iterator[Tuple[Any, Future]]:
+    """Yield (item, future) as the calls `fn(item)` complete, with at most `window` of them submitted.
+
+    Items are pulled lazily, so memory stays flat however long the input is. Once `cancelled`
+    is set nothing new is submitted, calls still queued are cancelled and the generator ends.
+    """
+    items = iter(items)
+    running: Dict[Future, Any] = {}
+    exhausted = False
+    while True:
+        while not exhausted and len(running) < window and not (cancelled is not None and cancelled.is_set()):
+            try:
+                item = next(items)
+            except StopIteration:
+                exhausted = True
+                break
+            running[executor.submit(fn, item)] = item
+        if cancelled is not None and cancelled.is_set():
+            for future in running:
+                future.cancel()
+            return
+        if not running:
+            return
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield running.pop(future), future
+
+def fetch_words(client: YoudaoClient, words: List[str], label: str,
+                on_result: Optional[Callable[[str, Any], None]] = None, refresh: bool = False,
+                cancelled: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Fetch each unique word once using multiple threads, returning word -> response.
 
-    # Use a shared manager and client for this file's word list
-    manager = ConcurrencyManager(initial_limit=8)
-    client = YoudaoClient(manager)
+    `on_result(word, response)` is called from the calling thread as each word completes;
+    responses handed to it are not kept, and the returned dict is empty.
+    Only a window of words proportional to the concurrency limit is submitted at a time.
+    """
+    results: Dict[str, Any] = {}
+    total = len(words)
     progress_lock = threading.Lock()
     processed_count = 0
 
-    logger.info(f"Starting multi-threaded processing for {file_path.name}...")
-    
-    # Process words in parallel
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futures = {executor.submit(process_word, client, item): item for item in word_list}
-        
-        for future in as_completed(futures):
+    # The limiter, not the pool size, decides how many requests are actually in flight
+    with ThreadPoolExecutor(max_workers=client.manager.max_limit) as executor:
+        fetch = lambda word: client.fetch_word_info(word, refresh)
+        for word, future in bounded_map(executor, fetch, words, client.manager.max_limit * SUBMIT_AHEAD, cancelled):
             # No matter if it succeeded or item was skipped, update progress
             processed_count += 1
-            display_progress(file_path.name, processed_count, total, progress_lock)
+            display_progress(label, processed_count, total, progress_lock)
             
             try:
-                future.result()
+                response = future.result()
+                if on_result is not None:
+                    on_result(word, response)
+                else:
+                    results[word] = response
             except Exception as e:
                 logger.error(f"\nWorker thread execution error: {e}")
                 # We don't necessarily want to kill the whole process here 
                 # unless it's the specific "failure after 3 retries" handled in YoudaoClient
-    
-    write_json(file_path, data)
-    logger.info(f"Done: {file_path.name}")
+
+    return results
+
+async def fetch_words_async(words: List[str], label: str, manager: ConcurrencyManager,
+                            cache: Optional[ResponseCache],
+                            on_result: Optional[Callable[[str, Any], None]] = None,
+                            refresh: bool = False,
+                            recorder: Optional[metrics.RequestMetrics] = None) -> Dict[str, Any]:
+    """Fetch each unique word once on a single event loop, returning word -> response.
+
+    As with fetch_words, responses handed to `on_result` are not kept in the returned dict.
+    """
+    try:
+        import aiohttp
+    except ImportError:
+        logger.error("The async engine requires aiohttp: pip install aiohttp")
+        sys.exit(1)
+
+    results: Dict[str, Any] = {}
+    total = len(words)
+    progress_lock = threading.Lock()
+    processed_count = 0
+
+    # One pooled HTTP/1.1 keep-alive connector sized to the largest limit the manager may reach
+    connector = aiohttp.TCPConnector(limit=manager.max_limit, keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(total=YoudaoClient.TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=YoudaoClient.HEADERS) as session:
+        client = AsyncYoudaoClient(manager, session, cache, recorder)
+        queue = iter(words)
+
+        async def worker() -> None:
+            # A fixed set of workers pulls from one iterator instead of one task per word
+            nonlocal processed_count
+            for word in queue:
+                try:
+                    response = await client.fetch_word_info(word, refresh)
+                    if on_result is not None:
+                        on_result(word, response)
+                    else:
+                        results[word] = response
+                except Exception as e:
+                    logger.error(f"\nAsync task execution error: {e}")
+                processed_count += 1
+                display_progress(label, processed_count, total, progress_lock)
+
+        await asyncio.gather(*(worker() for _ in range(min(manager.max_limit, max(total, 1)))))
+
+    return results
+
+def action_many(file_paths: List[Path], engine: str = "thread",
+                on_file_done: Optional[Callable[[Path], None]] = None,
+                policy: str = POLICY_MISSING, max_age_days: float = MAX_AGE_DAYS,
+                source: str = SOURCE_YOUDAO, metrics_path: Optional[Path] = None) -> None:
+    """Enrich several JSON files at once, fetching every distinct word only a single time.
+
+    `engine` is either "thread" (thread pool + requests) or "async" (one event loop + aiohttp).
+    `policy` is one of POLICIES and decides which items are fetched at all; items that do
+    not need it are left alone without any network I/O. `max_age_days` is capped at
+    MAX_AGE_DAYS, since older responses have already left the cache.
+    `source` is one of SOURCES; with the ecdict sources, words are looked up in the local
+    data/ecdict.db first and Youdao only fills what it lacks (or nothing, for "ecdict").
+    Progress is journaled per word, so an interrupted run resumes where it stopped.
+    `on_file_done(path)` is called as soon as each file has been rewritten.
+    Every request is measured; a summary is logged per file, and with `metrics_path` the
+    requests are also written there as JSON lines, next to a Prometheus text snapshot (.prom).
+    """
+    # Use a shared manager and cache for every file in the plan
+    cache = ResponseCache()
+    run_metrics = metrics.RequestMetrics(metrics_path)
+    if max_age_days > MAX_AGE_DAYS:
+        logger.warning(f"--max-age-days {max_age_days:g} exceeds the cache TTL, using {MAX_AGE_DAYS:g}")
+        max_age_days = MAX_AGE_DAYS
+    max_age = max_age_days * 24 * 3600
+
+    def needs_fetch(word: str, item: Dict[str, Any]) -> bool:
+        if policy == POLICY_FORCE or not is_complete(item):
+            return True
+        if policy == POLICY_STALE:
+            # Enrichment time is only known through the cache, so uncached items count as stale
+            age = cache.age(word, YoudaoClient.PARAMS)
+            return age is None or age > max_age
+        return False
+
+    documents: List[Path] = []
+    has_work = set() # Files with at least one item to enrich
+    journals: Dict[Path, WordJournal] = {}
+    word_journals: Dict[str, List[WordJournal]] = {} # Pending word -> journals of the files using it
+    file_words: Dict[Path, Set[str]] = {} # File -> its words that need enriching
+    resolved: Dict[str, Dict[str, Any]] = {} # Word -> enriched fields
+    total_items = 0
+
+    # Planning pass: stream every file once, keeping only the distinct words
+    for file_path in file_paths:
+        journal = WordJournal(file_path, {"policy": policy, "source": source, "max_age_days": max_age_days})
+        recorded = journal.load()
+        try:
+            with vocab_io.VocabReader(file_path) as reader:
+                count = 0
+                for item in reader:
+                    count += 1
+                    word = (item.get("value") or "").strip()
+                    if not word:
+                        continue
+                    total_items += 1
+                    if not needs_fetch(word, item):
+                        continue
+                    has_work.add(file_path)
+                    file_words.setdefault(file_path, set()).add(word)
+                    if word in recorded:
+                        resolved[word] = recorded[word]
+                    else:
+                        users = word_journals.setdefault(word, [])
+                        if journal not in users:
+                            users.append(journal)
+        except (ValueError, FileNotFoundError) as e:
+            logger.error(f"Failed to load JSON from {file_path}: {e}")
+            sys.exit(1)
+        if file_path not in has_work:
+            # Left over from a run killed after the rewrite but before its journal was removed
+            journal.discard()
+            recorded = {}
+        if count == 0:
+            logger.warning(f"No words found in {file_path}")
+            continue
+        if recorded:
+            logger.info(f"Resuming {file_path.name}: {len(recorded)} words recovered from journal")
+        documents.append(file_path)
+        journals[file_path] = journal
+
+    if not documents:
+        cache.close()
+        run_metrics.close()
+        return
+
+    # Words recovered from one file's journal do not need to be fetched for the others
+    pending = [word for word in word_journals if word not in resolved]
+    refresh = policy != POLICY_MISSING
+
+    def store(word: str, fields: Dict[str, Any]) -> None:
+        resolved[word] = fields
+        for journal in word_journals[word]:
+            journal.append(word, fields)
+
+    local: Dict[str, Dict[str, Any]] = {}
+    if source != SOURCE_YOUDAO and pending:
+        if ecdict.DB_PATH.exists():
+            rows = ecdict.EcdictLookup.shared().lookup_many(pending)
+            for word in pending:
+                row = rows.get(word)
+                if row is not None:
+                    local[word] = ecdict_fields(word, row)
+                    store(word, local[word])
+            logger.info(f"ECDICT provided {len(local)} of {len(pending)} words")
+        elif source == SOURCE_ECDICT:
+            logger.error(f"ECDICT database not found at {ecdict.DB_PATH}, nothing to enrich from")
+        else:
+            logger.warning(f"ECDICT database not found at {ecdict.DB_PATH}, using Youdao only")
+        if source == SOURCE_ECDICT:
+            pending = []
+        else:
+            pending = [word for word in pending if not is_complete(local.get(word, {}))]
+
+    def file_fields(file_path: Path) -> Optional[Dict[str, Dict[str, Any]]]:
+        if file_path not in has_work:
+            return None
+        return {word: resolved[word] for word in file_words[file_path] if word in resolved}
+
+    def file_done(file_path: Path) -> None:
+        if file_path in has_work:
+            journals[file_path].discard()
+            logger.info(f"Done: {file_path.name}")
+            run_metrics.file_summary(str(file_path), file_words[file_path])
+        else:
+            logger.info(f"Up to date: {file_path.name}")
+        if on_file_done is not None:
+            on_file_done(file_path)
+
+    # Every file is written back as soon as its own words are in, plan order first
+    scheduler = FileScheduler(documents, file_fields, policy, file_done)
+    waiting = set(pending)
+    for file_path in documents:
+        scheduler.expect(file_path, [word for word in file_words.get(file_path, ()) if word in waiting])
+
+    def record(word: str, info: Any) -> None:
+        fields = word_fields(info)
+        if word in local:
+            # ECDICT data wins, Youdao only fills its gaps
+            fields.update(local[word])
+        store(word, fields)
+        scheduler.resolve(word)
+
+    label = documents[0].name if len(documents) == 1 else f"{len(documents)} files"
+
+    try:
+        if engine == "async":
+            manager = ConcurrencyManager(initial_limit=ASYNC_INITIAL_IN_FLIGHT, max_limit=ASYNC_MAX_IN_FLIGHT)
+            logger.info(f"Starting async processing for {label}: {len(pending)} words to fetch out of {total_items}...")
+            asyncio.run(fetch_words_async(pending, label, manager, cache, record, refresh, run_metrics))
+        else:
+            manager = ConcurrencyManager(initial_limit=8)
+            client = YoudaoClient(manager, cache, run_metrics)
+            logger.info(f"Starting multi-threaded processing for {label}: {len(pending)} words to fetch out of {total_items}...")
+            fetch_words(client, pending, label, record, refresh)
+        scheduler.finish()
+    finally:
+        scheduler.shutdown()
+        cache.close()
+        for journal in journals.values():
+            journal.close()
+
+    logger.info(f"Cache hits: {cache.hits}, misses: {cache.misses}")
+    if metrics_path is not None:
+        run_metrics.write_prometheus(Path(metrics_path).with_suffix(".prom"))
+    run_metrics.close()
+
+def action(file_path_str: str, engine: str = "thread") -> None:
+    """Main action for a single JSON file processing using multiple threads."""
+    action_many([Path(file_path_str)], engine)
+
+def action_async(file_path_str: str) -> None:
+    """Single JSON file processing on the asyncio engine."""
+    action_many([Path(file_path_str)], "async")
@@ -1,9 +1,9 @@
 
 
 import sys
-import json
-import sqlite3
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any
 
@@ -22,6 +22,8 @@ except ImportError:
     # If running from root, maybe need this
     sys.path.append(str(Path(__file__).parent))
     import tech
+import ecdict
+import vocab_io
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -117,12 +119,16 @@ class Worker(QThread):
         self.unit_name = unit_name
         self.save_name = save_name
         self.save_location = save_location
-        self.running = True
+        self.cancelled = threading.Event()
 
     def run(self):
+        """Build the word list: batched ECDICT lookups, then concurrent Youdao fetches for gaps.
+
+        Items keep the input order. After `stop()`, fetches still queued are cancelled and
+        the affected items are saved with their ECDICT data only.
+        """
         try:
-            total_words = len(self.vocabulary)
-            processed_data = []
+            words = [w.strip() for w in self.vocabulary if w.strip()]
 
             # DB Connection
             db_path = BASE_DIR / "data/ecdict.db"
@@ -130,101 +136,41 @@ class Worker(QThread):
                 self.error.emit(f"Database not found at {db_path}")
                 return
 
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            # Initialize Youdao Client
-            manager = tech.ConcurrencyManager(initial_limit=4)
-            client = tech.YoudaoClient(manager)
-
-            for idx, word_str in enumerate(self.vocabulary):
-                if not self.running:
-                    break
-                
-                word_str = word_str.strip()
-                if not word_str:
-                    continue
-
-                self.progress.emit(idx + 1, total_words, f"Processing: {word_str}")
-
-                # 1. Fetch from ECDICT
-                cursor.execute("SELECT * FROM ecdict WHERE word = ?", (word_str,))
-                row = cursor.fetchone()
-                
-                # Default empty item
-                item = {
-                    "value": word_str,
-                    "usphone": "",
-                    "ukphone": "",
-                    "definition": "",
-                    "translation": "",
-                    "pos": "",
-                    "collins": 0,
-                    "oxford": False,
-                    "tag": "",
-                    "bnc": 0,
-                    "frq": 0,
-                    "exchange": "",
-                    "externalCaptions": [],
-                    "captions": []
-                }
-
-                if row:
-                    # Mapping based on DB schema
-                    # word, british_phonetic, american_phonetic, definition, translation, pos, collins, oxford, tag, bnc, frq, exchange
-                    if row[2]: item["usphone"] = f"/{row[2]}/"
-                    if row[1]: item["ukphone"] = f"/{row[1]}/"
-                    if row[3]: item["definition"] = row[3]
-                    if row[4]: item["translation"] = row[4]
-                    if row[5]: item["pos"] = row[5]
-                    
-                    try:
-                        item["collins"] = int(row[6]) if row[6] else 0
-                    except: pass
-                    
-                    try:
-                        item["oxford"] = bool(int(row[7])) if row[7] else False
-                    except: pass
-                    
-                    if row[8]: item["tag"] = row[8]
-                    try:
-                        item["bnc"] = int(row[9]) if row[9] else 0
-                    except: pass
-                    try:
-                        item["frq"] = int(row[10]) if row[10] else 0
-                    except: pass
-                    if row[11]: item["exchange"] = row[11]
-
-                # 2. Add Info from Youdao
-                try:
-                    yg_info = client.fetch_word_info(word_str)
-                    if yg_info:
-                        ec_data = yg_info.get("ec", {}).get("word", [{}])[0]
-                        # Prioritize Youdao phonetics if missing
-                        if "usphone" in ec_data and not item["usphone"]:
-                            item["usphone"] = f"/{ec_data['usphone']}/"
-                        if "ukphone" in ec_data and not item["ukphone"]:
-                            item["ukphone"] = f"/{ec_data['ukphone']}/"
-                        
-                        trs = ec_data.get("trs", [])
-                        translations = []
-                        for tr in trs:
-                            l_data = tr.get("tr", [{}])[0].get("l", {}).get("i", [])
-                            if l_data:
-                                translations.append(l_data[0])
-                        
-                        if translations:
-                             if not item["translation"]:
-                                 item["translation"] = "\n".join(translations)
-                except SystemExit:
-                    self.error.emit(f"Youdao API fatal error for {word_str}")
-                    return
-                except Exception as e:
-                    pass # Ignore recoverable API errors
+            # 1. Fetch from ECDICT in a handful of batched queries
+            lookup = ecdict.EcdictLookup.shared(db_path)
+            rows = lookup.lookup_many(words)
 
+            processed_data = []
+            for word_str in words:
+                item = ecdict.new_item(word_str)
+                ecdict.apply_row(item, rows.get(word_str))
                 processed_data.append(item)
-            
-            conn.close()
+
+            # 2. Add Info from Youdao, only for items ECDICT left incomplete
+            todo = [item for item in processed_data if not tech.is_complete(item)]
+            total = len(todo)
+            self.progress.emit(0, max(total, 1), "Fetching from Youdao...")
+
+            manager = tech.ConcurrencyManager(initial_limit=8)
+            cache = tech.ResponseCache()
+            client = tech.YoudaoClient(manager, cache)
+            executor = ThreadPoolExecutor(max_workers=manager.max_limit)
+            try:
+                fetch = lambda item: client.fetch_word_info(item["value"])
+                window = manager.max_limit * tech.SUBMIT_AHEAD
+                for done, (item, future) in enumerate(tech.bounded_map(executor, fetch, todo, window, self.cancelled), start=1):
+                    self.progress.emit(done, total, f"Processing: {item['value']}")
+                    try:
+                        # Youdao only fills fields ECDICT left empty
+                        tech.merge_fields(item, tech.word_fields(future.result()), tech.POLICY_MISSING)
+                    except SystemExit:
+                        self.error.emit(f"Youdao API fatal error for {item['value']}")
+                        return
+                    except Exception as e:
+                        pass # Ignore recoverable API errors
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+                cache.close()
 
             # Construct Final JSON
             final_json = {
@@ -245,8 +191,7 @@ class Worker(QThread):
                 if not self.save_name.endswith(".json"):
                     full_path = full_path.with_suffix(".json")
 
-                with open(full_path, "w", encoding="utf-8") as f:
-                    json.dump(final_json, f, ensure_ascii=False, indent=4)
+                vocab_io.atomic_write_json(full_path, final_json)
             
                 self.finished.emit(str(full_path))
             except Exception as e:
@@ -257,7 +202,7 @@ class Worker(QThread):
             self.error.emit(str(e))
 
     def stop(self):
-        self.running = False
+        self.cancelled.set()
 
 
 class ModernInput(QWidget):
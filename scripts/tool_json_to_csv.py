@@ -1,9 +1,15 @@
 
-import json
 import csv
 import sys
+from itertools import chain
 from pathlib import Path
 
+try:
+    from vocab_io import AtomicFile, VocabReader
+except ImportError:
+    sys.path.append(str(Path(__file__).parent))
+    from vocab_io import AtomicFile, VocabReader
+
 def convert_json_to_csv(json_path: str):
     """
     Converts a JSON file containing a 'wordList' into a CSV file.
@@ -16,14 +22,15 @@ def convert_json_to_csv(json_path: str):
         return
 
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        reader = VocabReader(path)
+        items = iter(reader)
+        first = next(items, None)
     except Exception as e:
         print(f"Error reading JSON: {e}")
         return
 
-    word_list = data.get('wordList', [])
-    if not word_list:
+    if first is None:
+        reader.close()
         print("Warning: No 'wordList' found in JSON.")
         return
 
@@ -31,12 +38,13 @@ def convert_json_to_csv(json_path: str):
     csv_path = path.with_suffix('.csv')
 
     try:
-        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        with reader, AtomicFile(csv_path, newline='') as f:
             # Use csv.writer for accurate CSV formatting
             # quotechar='"' and quoting=csv.QUOTE_MINIMAL is default and usually best
             writer = csv.writer(f, quoting=csv.QUOTE_ALL)
             
-            for word in word_list:
+            # Items are streamed one at a time, so large lists use constant memory
+            for word in chain([first], items):
                 # Extract fields in specified order: value, usphone, ukphone, translation
                 # Replace \n with <br> as requested
                 row = [
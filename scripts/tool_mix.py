@@ -1,14 +1,14 @@
 import sys
-import json
 import time
-import io
 import os
-import shutil
-import hashlib
-import subprocess
 import requests
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
+
+# Headless commands (`python -m tool_mix build|batch ...`) must not need PySide6
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] in ("build", "batch"):
+    sys.path.append(str(Path(__file__).parent))
+    import audio_engine
+    sys.exit(audio_engine.main(sys.argv[1:]))
 
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                                QHBoxLayout, QLabel, QLineEdit, QPushButton, 
@@ -19,14 +19,13 @@ from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
 from PySide6.QtCore import Qt, QThread, Signal, QSize, QUrl, QPropertyAnimation
 from PySide6.QtGui import QIcon, QColor, QDesktopServices, QDragEnterEvent, QDropEvent, QFont, QPalette, QTextCursor
 
-# 音频处理库
-from pydub import AudioSegment
-from pydub.silence import detect_nonsilent
-
-# --- 全局配置 ---
-CACHE_DIR = Path("cache")
-CACHE_EXPIRY = 30 * 24 * 3600
-TEMP_DIR = Path("temp_chunks")
+# Qt-free audio pipeline from the same directory
+try:
+    import audio_engine
+except ImportError:
+    sys.path.append(str(Path(__file__).parent))
+    import audio_engine
+from audio_engine import AudioBuild
 
 # --- 强制亮色主题样式表 (Force Light Theme QSS) ---
 PREMIUM_STYLESHEET = """
@@ -190,58 +189,6 @@ QScrollBar::handle:vertical {
 
 # --- 业务逻辑 ---
 
-class AudioUtils:
-    @staticmethod
-    def trim_silence(audio: AudioSegment) -> AudioSegment:
-        if len(audio) == 0: return audio
-        ranges = detect_nonsilent(audio, min_silence_len=50, silence_thresh=-40)
-        if ranges: return audio[ranges[0][0]:ranges[-1][1]]
-        return audio
-
-    @staticmethod
-    def get_cache_path(word: str, type_code: int) -> Path:
-        safe = "".join([c for c in word if c.isalnum() or c in ('-', '_')]).strip()
-        if not safe: safe = hashlib.md5(word.encode()).hexdigest()
-        return CACHE_DIR / f"{safe}_{type_code}.mp3"
-
-    @staticmethod
-    def fetch_task(word: str, type_code: int):
-        if not CACHE_DIR.exists(): CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        path = AudioUtils.get_cache_path(word, type_code)
-        
-        # Cache Hit
-        if path.exists():
-            try:
-                if time.time() - path.stat().st_mtime < CACHE_EXPIRY:
-                    data = path.read_bytes()
-                    if data: return 200, data, True
-            except: pass
-
-        # Network
-        url = f"https://dict.youdao.com/dictvoice?audio={requests.utils.quote(word)}&type={type_code}"
-        try:
-            r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=5)
-            if r.status_code == 200 and r.content:
-                try: path.write_bytes(r.content)
-                except: pass
-                return 200, r.content, False
-            return r.status_code, None, False
-        except:
-            return -1, None, False
-
-    @staticmethod
-    def ffmpeg_merge(files, out_path):
-        list_path = TEMP_DIR / "list.txt"
-        with open(list_path, 'w', encoding='utf-8') as f:
-            for p in files: f.write(f"file '{p.absolute().as_posix()}'\n")
-        
-        cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", str(list_path),
-               "-acodec", "libmp3lame", "-q:a", "2", str(out_path)]
-        
-        si = subprocess.STARTUPINFO()
-        si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        subprocess.run(cmd, startupinfo=si, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
 class PipelineWorker(QThread):
     progress = Signal(int, int, str)
     log = Signal(str, str) 
@@ -253,145 +200,16 @@ class PipelineWorker(QThread):
         self.json_path = json_path
         self.out_path = out_path
         self.cfg = cfg
-        self._cancel = False
+        self.build = AudioBuild(json_path, out_path, cfg, on_progress=self.progress.emit,
+                                on_log=self.log.emit, on_threads=self.thread_adj.emit)
 
-    def kill(self): self._cancel = True
+    def kill(self): self.build.cancel()
 
     def run(self):
-        if TEMP_DIR.exists(): shutil.rmtree(TEMP_DIR)
-        TEMP_DIR.mkdir(parents=True, exist_ok=True)
-        
-        executor = None
-        chunks = []
-        
         try:
-            with open(self.json_path, 'r', encoding='utf-8') as f:
-                words = json.load(f).get("wordList", [])
-            
-            if not words: raise Exception("JSON 文件中未找到单词列表")
-            total = len(words)
-            
-            # Init Pipeline
-            max_th = self.cfg['max_threads']
-            curr_th = max_th
-            last_change = time.time()
-            
-            executor = ThreadPoolExecutor(max_workers=32)
-            futures = {} 
-            processed = 0
-            submitted = 0
-            
-            batch_audio = AudioSegment.empty()
-            batch_count = 0
-            
-            self.log.emit("info", f"🚀 开始任务，共 {total} 个单词")
-            
-            while processed < total:
-                if self._cancel: raise Exception("操作已取消")
-
-                # Recovery
-                if submitted < total and curr_th < max_th and (time.time() - last_change > 5):
-                    new_th = min(int(curr_th * 1.5) + 1, max_th)
-                    curr_th = new_th
-                    last_change = time.time()
-                    self.thread_adj.emit(curr_th)
-                    self.log.emit("success", f"📈 网络稳定，线程恢复至 {curr_th}")
-
-                # Submit
-                while submitted < total and (submitted - processed < 50) and (submitted - processed < curr_th * 2):
-                    if self._cancel: break
-                    w_txt = words[submitted].get("value", "")
-                    tasks = {}
-                    if w_txt:
-                        if self.cfg['uk']: tasks['uk'] = executor.submit(AudioUtils.fetch_task, w_txt, 1)
-                        if self.cfg['us']: tasks['us'] = executor.submit(AudioUtils.fetch_task, w_txt, 2)
-                        if not tasks: tasks['us'] = executor.submit(AudioUtils.fetch_task, w_txt, 2)
-                    futures[submitted] = tasks
-                    submitted += 1
-
-                # Process
-                current_task = futures.get(processed)
-                if not current_task:
-                    processed += 1; continue
-                
-                if not all(f.done() for f in current_task.values()):
-                    time.sleep(0.02); continue
-
-                w_txt = words[processed].get("value", "")
-                segments = []
-                keys = []
-                if self.cfg['uk']: keys.append('uk')
-                if self.cfg['us']: keys.append('us')
-                if not keys: keys.append('us')
-
-                for k in keys:
-                    if k in current_task:
-                        try:
-                            code, data, cached = current_task[k].result()
-                            if code == 200 and data:
-                                seg = AudioSegment.from_mp3(io.BytesIO(data))
-                                segments.append(AudioUtils.trim_silence(seg))
-                            elif code == 429 and not cached:
-                                self.log.emit("warning", f"⚠️ 429 限流: {w_txt} - 正在避让")
-                                curr_th = max(1, curr_th // 2)
-                                last_change = time.time()
-                                self.thread_adj.emit(curr_th)
-                        except: pass
-
-                # Merge
-                if segments:
-                    for i, seg in enumerate(segments):
-                        batch_audio += seg
-                        is_last = (i == len(segments)-1) and (processed == total-1)
-                        if not is_last:
-                            ms = self.cfg['fix_val']*1000 if self.cfg['interval_mode']=='fixed' else len(seg)*self.cfg['rate_val']
-                            batch_audio += AudioSegment.silent(duration=int(ms))
-                
-                del futures[processed]
-                processed += 1
-                batch_count += 1
-                
-                if processed % 5 == 0 or processed == total:
-                    self.progress.emit(processed, total, f"处理中: {w_txt}")
-
-                # Flush to Disk
-                if len(batch_audio) > 60000 or batch_count >= 50:
-                    fname = TEMP_DIR / f"part_{len(chunks):04d}.wav"
-                    batch_audio.export(fname, format="wav")
-                    chunks.append(fname)
-                    batch_audio = AudioSegment.empty()
-                    batch_count = 0
-                    import gc; gc.collect()
-
-            # Flush remaining
-            if len(batch_audio) > 0:
-                fname = TEMP_DIR / f"part_{len(chunks):04d}.wav"
-                batch_audio.export(fname, format="wav")
-                chunks.append(fname)
-
-            executor.shutdown(wait=True)
-            if self._cancel: raise Exception("用户取消")
-            if not chunks: raise Exception("未生成有效音频")
-
-            # Final Merge
-            self.progress.emit(100, 100, "最终编码合并中...")
-            self.log.emit("info", "🎬 正在调用 FFmpeg 进行高速合并...")
-            
-            try:
-                subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                AudioUtils.ffmpeg_merge(chunks, self.out_path)
-            except FileNotFoundError:
-                self.log.emit("warning", "❌ 未检测到 FFmpeg，使用备用方案（较慢）...")
-                full = AudioSegment.empty()
-                for c in chunks: full += AudioSegment.from_wav(c)
-                full.export(self.out_path, format="mp3")
-
-            shutil.rmtree(TEMP_DIR)
+            self.build.run()
             self.finished.emit(True, f"文件已保存至: {self.out_path}")
-
         except Exception as e:
-            if executor: executor.shutdown(wait=False)
-            if TEMP_DIR.exists(): shutil.rmtree(TEMP_DIR)
             self.finished.emit(False, str(e))
 
 class NetworkThread(QThread):
@@ -545,6 +363,8 @@ class MainWindow(QMainWindow):
         self.spin_th = QSpinBox(); self.spin_th.setRange(1, 64); self.spin_th.setValue(16)
         row_th.addWidget(self.spin_th)
         p_layout.addLayout(row_th)
+        self.chk_stream = QCheckBox("流式编码（边下载边编码）"); self.chk_stream.setChecked(True)
+        p_layout.addWidget(self.chk_stream)
         self.lbl_th_status = QLabel("状态: 空闲")
         self.lbl_th_status.setStyleSheet("color: #64748B; font-size: 11px; border:none;")
         p_layout.addWidget(self.lbl_th_status)
@@ -663,7 +483,8 @@ class MainWindow(QMainWindow):
             'uk': self.chk_uk.isChecked(), 'us': self.chk_us.isChecked(),
             'max_threads': self.user_threads,
             'interval_mode': 'fixed' if self.bg_int.checkedId() == 1 else 'rate',
-            'fix_val': self.v_fix.value(), 'rate_val': self.v_rate.value()
+            'fix_val': self.v_fix.value(), 'rate_val': self.v_rate.value(),
+            'stream': self.chk_stream.isChecked()
         }
         
         self.worker = PipelineWorker(self.json_path, self.out_path, cfg)
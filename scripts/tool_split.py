@@ -4,8 +4,15 @@ import sys
 import os
 import hashlib
 import tkinter as tk
+from pathlib import Path
 from tkinter import filedialog, messagebox
 
+try:
+    from vocab_io import VocabReader, atomic_write_json
+except ImportError:
+    sys.path.append(str(Path(__file__).parent))
+    from vocab_io import VocabReader, atomic_write_json
+
 # ========== 你需要实现的函数 ==========
 def mysplit(data):
     """
@@ -24,23 +31,38 @@ def mysplit(data):
     if not isinstance(word_list, list):
         raise ValueError("mysplit: 字段 wordList 必须是数组(list)。")
 
-    base_name = data.get("name", "")
-    chunk_size = 20
-    result = []
+    # 原对象本身作为 header 传入，wordList 在各组中原位替换，字段顺序不变
+    return list(mysplit_stream(data, word_list))
+
 
-    for start in range(0, len(word_list), chunk_size):
-        chunk = word_list[start:start + chunk_size]
-        idx = start // chunk_size + 1
+def mysplit_stream(header, items, chunk_size=20):
+    """
+    mysplit 的流式版本：逐个读取 wordList 元素，每凑满一组就产出一个对象，
+    内存占用只与组大小有关，与原列表长度无关。
+    - header 为原对象中除 wordList 外的字段（来自 VocabReader.header）；
+    - items 为 wordList 元素的迭代器。
+    """
+    base_name = header.get("name", "")
+    chunk = []
+    idx = 0
 
-        # 复制原对象并覆盖必要字段
-        part = dict(data)  # 浅拷贝即可，下面会替换 wordList
+    def make_part():
+        part = dict(header)
         part["wordList"] = chunk
-        part["size"] = len(chunk)  # 对前面各组会是 20，最后一组是剩余长度
+        part["size"] = len(chunk)
         part["name"] = f"{base_name}-{idx}" if base_name else f"part-{idx}"
+        return part
 
-        result.append(part)
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            idx += 1
+            yield make_part()
+            chunk = []
 
-    return result
+    if chunk:
+        idx += 1
+        yield make_part()
 
 
 # ========== 工具函数 ==========
@@ -57,69 +79,105 @@ def write_json_safe(file_path, data):
     与上面的 write_json 类似，但不调用 sys.exit，便于在 GUI 中用 messagebox 报错。
     """
     try:
-        with open(file_path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
+        atomic_write_json(file_path, data)
     except Exception as e:
         raise IOError(f'写入文件失败: {file_path}, 错误: {e}') from e
 
 
+class PartError(Exception):
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+
+def write_parts(base, parts):
+    """
+    逐个写出拆分结果，返回生成的文件路径列表；出错时抛出 PartError。
+    任何一步出错（包括 parts 迭代本身抛出的异常）都会删除已写出的文件，不留下不完整的结果。
+    """
+    generated_files = []
+    try:
+        for i, obj in enumerate(parts, start=1):
+            # 序列化检查并计算 md5
+            try:
+                _ = json.dumps(obj)  # 序列化合法性检查
+                md5sum = compute_md5_for_json(obj)
+            except TypeError as e:
+                raise PartError('序列化失败', f'第 {i} 个元素无法 JSON 序列化:\n{e}') from e
+            except Exception as e:
+                raise PartError('错误', f'第 {i} 个元素处理 md5 时出错:\n{e}') from e
+
+            out_path = f'{base}-{i}-{md5sum}.part.json'
+            try:
+                write_json_safe(out_path, obj)
+                generated_files.append(out_path)
+            except Exception as e:
+                raise PartError('写入失败', f'写入文件时发生错误:\n{e}') from e
+    except BaseException:
+        for path in generated_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        raise
+
+    return generated_files
+
+
+def read_header(file_path):
+    """
+    完整读取一遍文件：校验整个 JSON，并收集 wordList 前后的所有字段。
+    返回的 header 保留原字段顺序（wordList 占位），wordList 不存在时返回 None。
+    """
+    with VocabReader(file_path) as reader:
+        if not reader.has_list:
+            return None
+        leading = dict(reader.header)
+        for _ in reader:
+            pass
+        trailer = {k: v for k, v in reader.header.items() if k not in leading}
+    return {**leading, 'wordList': [], **trailer}
+
+
+def split_file(file_path):
+    """
+    流式拆分一个 JSON 文件，返回生成的文件路径列表。
+    先完整解析一遍再写出，损坏的文件不会产生任何输出；wordList 之后的字段也会写入每一个分组。
+    JSON 解析失败时抛出 ValueError，wordList 缺失或写出失败时抛出 PartError。
+    """
+    base, _ = os.path.splitext(file_path)
+    header = read_header(file_path)
+    if header is None:
+        raise PartError('mysplit 出错', '调用 mysplit 时发生错误:\nmysplit: 字段 wordList 必须是数组(list)。')
+    with VocabReader(file_path) as reader:
+        return write_parts(base, mysplit_stream(header, reader))
+
+
 def process_file(file_path):
     # 校验扩展名
-    base, ext = os.path.splitext(file_path)
+    _, ext = os.path.splitext(file_path)
     if ext.lower() != '.json':
         messagebox.showerror('错误', '请选择 .json 文件。')
         return
 
-    # 读取 JSON（使用不退出进程的方式）
+    # 流式读取 JSON（使用不退出进程的方式）
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except json.JSONDecodeError as e:
+        generated_files = split_file(file_path)
+    except PartError as e:
+        messagebox.showerror(e.title, e.message)
+        return
+    except ValueError as e:
         messagebox.showerror('JSON 解析错误', f'文件: {file_path}\n错误: {e}')
         return
     except Exception as e:
         messagebox.showerror('读取失败', f'文件: {file_path}\n错误: {e}')
         return
 
-    # 调用用户的 mysplit
-    try:
-        parts = mysplit(data)
-    except NotImplementedError as e:
-        messagebox.showwarning('未实现', str(e))
-        return
-    except Exception as e:
-        messagebox.showerror('mysplit 出错', f'调用 mysplit 时发生错误:\n{e}')
-        return
-
-    if not isinstance(parts, (list, tuple)):
-        messagebox.showerror('类型错误', 'mysplit 必须返回 list 或 tuple。')
-        return
-
-    if len(parts) == 0:
+    if len(generated_files) == 0:
         messagebox.showinfo('提示', 'mysplit 返回了空列表，没有生成任何文件。')
         return
 
-    generated_files = []
-    for i, obj in enumerate(parts, start=1):
-        # 序列化检查并计算 md5
-        try:
-            _ = json.dumps(obj)  # 序列化合法性检查
-            md5sum = compute_md5_for_json(obj)
-        except TypeError as e:
-            messagebox.showerror('序列化失败', f'第 {i} 个元素无法 JSON 序列化:\n{e}')
-            return
-        except Exception as e:
-            messagebox.showerror('错误', f'第 {i} 个元素处理 md5 时出错:\n{e}')
-            return
-
-        out_path = f'{base}-{i}-{md5sum}.part.json'
-        try:
-            write_json_safe(out_path, obj)
-            generated_files.append(out_path)
-        except Exception as e:
-            messagebox.showerror('写入失败', f'写入文件时发生错误:\n{e}')
-            return
-
     messagebox.showinfo('完成', f'已生成 {len(generated_files)} 个文件:\n' + '\n'.join(generated_files))
 
 
@@ -0,0 +1,300 @@
+import filecmp
+import json
+import os
+import stat
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+CHUNK_SIZE = 64 * 1024
+LIST_KEY = "wordList"
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+def _read_umask() -> int:
+    # os.umask can only be read by setting it, so do it once at import time rather than per write
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+_UMASK = _read_umask()
+
+_NUMBER_CHARS = "0123456789.eE+-"
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _dumps(value: Any, indent_level: int) -> str:
+    """Serialize a value exactly like json.dump(indent=4) would at the given nesting level."""
+    text = json.dumps(value, ensure_ascii=False, indent=4)
+    return text.replace("\n", "\n" + " " * (4 * indent_level))
+
+class AtomicFile:
+    """Text file written to a sibling temporary file and moved over the target on `commit()`.
+
+    The data is fsynced before the rename, so readers only ever see the old or the new
+    content, never a truncated file. With `skip_identical`, an unchanged result leaves
+    the target untouched.
+    """
+    def __init__(self, path: Path, skip_identical: bool = True, newline: Optional[str] = None):
+        self.path = Path(path)
+        self.skip_identical = skip_identical
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        self.tmp_path = Path(tmp_name)
+        self.file: TextIO = os.fdopen(fd, "w", encoding="utf-8", newline=newline)
+
+    def __enter__(self) -> TextIO:
+        return self.file
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def write(self, text: str) -> None:
+        self.file.write(text)
+
+    def commit(self) -> bool:
+        """Move the new content into place. Returns False when it was identical and skipped."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        if self.skip_identical and self.path.exists() and filecmp.cmp(self.tmp_path, self.path, shallow=False):
+            self.tmp_path.unlink()
+            return False
+        # mkstemp creates the file 0600, keep the permissions the target has (or would get)
+        os.chmod(self.tmp_path, self._target_mode())
+        os.replace(self.tmp_path, self.path)
+        _fsync_dir(self.path.parent)
+        return True
+
+    def abort(self) -> None:
+        self.file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+    def _target_mode(self) -> int:
+        try:
+            return stat.S_IMODE(os.stat(self.path).st_mode)
+        except FileNotFoundError:
+            return 0o666 & ~_UMASK
+
+def _fsync_dir(directory: Path) -> None:
+    """Persist the rename itself; directories cannot be opened this way on Windows."""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def atomic_write_json(path: Path, data: Any, skip_identical: bool = True) -> bool:
+    """Atomically write data as json.dump(indent=4, ensure_ascii=False). Returns False if unchanged."""
+    target = AtomicFile(path, skip_identical)
+    try:
+        json.dump(data, target.file, ensure_ascii=False, indent=4)
+    except BaseException:
+        target.abort()
+        raise
+    return target.commit()
+
+class VocabReader:
+    """Incremental reader for vocabulary JSON files.
+
+    Header fields (`name`, `type`, `size`, ...) are parsed into `header`, and `wordList`
+    items are yielded one at a time, so memory use does not grow with the list length.
+    Fields placed after `wordList` are added to `header` once iteration is finished.
+    """
+    def __init__(self, path: Path, chunk_size: int = CHUNK_SIZE):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.file: TextIO = open(self.path, "r", encoding="utf-8")
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.header: Dict[str, Any] = {}
+        self.has_list = False
+        self._in_list = False
+        self._done = False
+        self._start()
+
+    def __enter__(self) -> "VocabReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.file.close()
+
+    # --- low level buffer handling ---
+
+    def _read_more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop the consumed prefix so the buffer only holds the current token
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._read_more():
+                raise ValueError(f"Unexpected end of JSON in {self.path}")
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found}' at offset {self.pos} in {self.path}")
+        self.pos += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A number cut at the chunk boundary still decodes ("2." as 2), so only accept
+                # it once the character after it can no longer continue the token
+                cut = end == len(self.buf) or (_is_number(value) and self.buf[end] in _NUMBER_CHARS)
+                if not cut:
+                    self.pos = end
+                    return value
+                if self.eof:
+                    if end == len(self.buf):
+                        self.pos = end
+                        return value
+                    raise ValueError(f"Invalid number at offset {self.pos} in {self.path}")
+            self._read_more()
+
+    # --- document structure ---
+
+    def _start(self) -> None:
+        self._expect("{")
+        self._read_fields()
+
+    def _read_fields(self) -> None:
+        """Parse object members into header until the word list starts or the object ends."""
+        while True:
+            char = self._peek()
+            if char == "}":
+                self.pos += 1
+                self._done = True
+                return
+            if char == ",":
+                self.pos += 1
+                continue
+            key = self._value()
+            self._expect(":")
+            if key == LIST_KEY and self._peek() == "[":
+                self.pos += 1
+                self.has_list = True
+                self._in_list = True
+                return
+            self.header[key] = self._value()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        while self._in_list:
+            char = self._peek()
+            if char == "]":
+                self.pos += 1
+                self._in_list = False
+                self._read_fields()
+                break
+            if char == ",":
+                self.pos += 1
+                continue
+            yield self._value()
+
+class VocabWriter:
+    """Incremental writer producing the same layout as json.dump(indent=4, ensure_ascii=False).
+
+    Output goes through an AtomicFile that replaces the target on `close()`, so a file
+    can be rewritten while a VocabReader is still streaming from it.
+    """
+    def __init__(self, path: Path, header: Dict[str, Any], skip_identical: bool = True):
+        self.path = Path(path)
+        self.target = AtomicFile(self.path, skip_identical)
+        self.file: TextIO = self.target.file
+        self.count = 0
+        self.changed = False
+        self.file.write("{")
+        self._first_field = True
+        for key, value in header.items():
+            if key != LIST_KEY:
+                self._field(key, value)
+        self._key(LIST_KEY)
+        self.file.write("[")
+
+    def __enter__(self) -> "VocabWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _key(self, key: str) -> None:
+        self.file.write("\n    " if self._first_field else ",\n    ")
+        self._first_field = False
+        self.file.write(json.dumps(key, ensure_ascii=False) + ": ")
+
+    def _field(self, key: str, value: Any) -> None:
+        self._key(key)
+        self.file.write(_dumps(value, 1))
+
+    def write(self, item: Dict[str, Any]) -> None:
+        self.file.write("\n        " if self.count == 0 else ",\n        ")
+        self.file.write(_dumps(item, 2))
+        self.count += 1
+
+    def close(self, trailer: Optional[Dict[str, Any]] = None) -> None:
+        """Finish the list, append fields that belong after it and move the file into place."""
+        self.file.write("\n    ]" if self.count else "]")
+        for key, value in (trailer or {}).items():
+            self._field(key, value)
+        self.file.write("\n}")
+        self.changed = self.target.commit()
+
+    def abort(self) -> None:
+        self.target.abort()
+
+def count_items(path: Path) -> int:
+    """Count wordList items without loading the list."""
+    with VocabReader(path) as reader:
+        return sum(1 for _ in reader)
+
+def rewrite(path: Path, transform, header_update: Optional[Dict[str, Any]] = None) -> int:
+    """Stream a vocabulary file through `transform(item)` and write it back in place.
+
+    Items for which `transform` returns None are dropped. Returns the number of items written.
+    """
+    with VocabReader(path) as reader:
+        leading = dict(reader.header)
+        leading.update(header_update or {})
+        writer = VocabWriter(path, leading)
+        try:
+            for item in reader:
+                result = transform(item)
+                if result is not None:
+                    writer.write(result)
+        except BaseException:
+            writer.abort()
+            raise
+        trailer = {key: value for key, value in reader.header.items() if key not in leading}
+    writer.close(trailer)
+    return writer.count
@@ -0,0 +1,190 @@
+import argparse
+import json
+import logging
+import random
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RECORD_DB = BASE_DIR / "cache" / "youdao.db"
+AUDIO_CACHE = BASE_DIR / "cache" / "audio"
+
+def make_payload(usphone: Optional[str], ukphone: Optional[str], translations: List[str]) -> Dict:
+    """A jsonapi response with the fields the enrichment code reads."""
+    entry: Dict = {"trs": [{"tr": [{"l": {"i": [text]}}]} for text in translations]}
+    if usphone is not None:
+        entry["usphone"] = usphone
+    if ukphone is not None:
+        entry["ukphone"] = ukphone
+    return {"ec": {"word": [entry]}}
+
+def synthetic_payload(word: str) -> Dict:
+    return make_payload(f"us-{word}", f"uk-{word}", [f"n. {word}"])
+
+def recorded_payload(text: str) -> str:
+    """The cache holds parsed records (tech.WordRecord); turn one back into a response. Raw responses pass through."""
+    data = json.loads(text)
+    if isinstance(data, dict) and "tr" in data:
+        return json.dumps(make_payload(data.get("us"), data.get("uk"), data["tr"]), ensure_ascii=False)
+    return text
+
+def synthetic_mp3(seconds: float = 0.6) -> bytes:
+    """A short tone encoded by ffmpeg, or a few placeholder bytes when ffmpeg is missing."""
+    if not shutil.which("ffmpeg"):
+        return b"\xff\xfb" + bytes(415)
+    cmd = ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+           "-af", "adelay=200,apad=pad_dur=0.3", "-ac", "1", "-f", "mp3", "pipe:1"]
+    return subprocess.run(cmd, capture_output=True, check=True).stdout
+
+class Recordings:
+    """Recorded payloads: jsonapi responses rebuilt from the response cache, MP3s from the audio cache."""
+    def __init__(self, record_db: Optional[Path] = RECORD_DB, audio_cache: Optional[Path] = AUDIO_CACHE):
+        self.payloads: Dict[str, str] = {}
+        self.voices: Dict[Tuple[str, int], bytes] = {}
+        if record_db and Path(record_db).exists():
+            conn = sqlite3.connect(f"{Path(record_db).resolve().as_uri()}?mode=ro", uri=True)
+            for word, payload in conn.execute("SELECT word, payload FROM responses"):
+                self.payloads.setdefault(word, recorded_payload(payload))
+            conn.close()
+        if audio_cache and (Path(audio_cache) / "index.db").exists():
+            root = Path(audio_cache)
+            conn = sqlite3.connect(f"{(root / 'index.db').resolve().as_uri()}?mode=ro", uri=True)
+            for word, voice, digest in conn.execute("SELECT word, voice, hash FROM clips WHERE kind = 'mp3'"):
+                try:
+                    self.voices[(word, voice)] = (root / digest[:2] / digest[2:4] / digest).read_bytes()
+                except OSError:
+                    pass
+            conn.close()
+        self.default_mp3 = synthetic_mp3()
+        logger.info(f"Loaded {len(self.payloads)} recorded responses and {len(self.voices)} recorded clips")
+
+    def payload(self, word: str) -> bytes:
+        normalized = " ".join(word.split()).lower()
+        text = self.payloads.get(normalized)
+        return (text or json.dumps(synthetic_payload(word), ensure_ascii=False)).encode("utf-8")
+
+    def voice(self, word: str, type_code: int) -> bytes:
+        return self.voices.get((word, type_code), self.default_mp3)
+
+class Behaviour:
+    """Latency, jitter, random errors and periodic 429 bursts."""
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, error_rate: float = 0.0,
+                 burst_every: float = 0.0, burst_len: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_len = burst_len
+        self.started = time.monotonic()
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts: Dict[int, int] = {}
+
+    def status(self) -> int:
+        # Bursts close each period, so every run starts with a quiet phase
+        if self.burst_every > 0 and (time.monotonic() - self.started) % self.burst_every >= self.burst_every - self.burst_len:
+            return 429
+        with self.lock:
+            failed = self.random.random() < self.error_rate
+        return 500 if failed else 200
+
+    def delay(self) -> float:
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def record(self, status: int) -> None:
+        with self.lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real endpoint
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        behaviour: Behaviour = self.server.behaviour
+        recordings: Recordings = self.server.recordings
+
+        time.sleep(behaviour.delay())
+        status = behaviour.status()
+        if url.path == "/jsonapi" and status == 200:
+            body, content_type = recordings.payload(query.get("q", "")), "application/json; charset=utf-8"
+        elif url.path == "/dictvoice" and status == 200:
+            body, content_type = recordings.voice(query.get("audio", ""), int(query.get("type", 2))), "audio/mpeg"
+        elif url.path in ("/", "/jsonapi", "/dictvoice"):
+            body, content_type = b"" if status == 200 else json.dumps({"status": status}).encode(), "application/json"
+        else:
+            status, body, content_type = 404, b"", "text/plain"
+        behaviour.record(status)
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    """Local stand-in for dict.youdao.com serving /jsonapi and /dictvoice."""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, behaviour: Behaviour, recordings: Recordings, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), StubHandler)
+        self.behaviour = behaviour
+        self.recordings = recordings
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+def add_behaviour_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=float, default=50, help="Mean response latency in ms (default: %(default)s)")
+    parser.add_argument("--jitter", type=float, default=20, help="Latency jitter in ms, uniform +/- (default: %(default)s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500 (default: %(default)s)")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="Start a 429 burst every N seconds, 0 disables (default: %(default)s)")
+    parser.add_argument("--burst-len", type=float, default=1.0, help="Length of each 429 burst in seconds (default: %(default)s)")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible jitter and errors")
+    parser.add_argument("--record-db", type=Path, default=RECORD_DB, help="Response cache to replay (default: cache/youdao.db)")
+    parser.add_argument("--audio-cache", type=Path, default=AUDIO_CACHE, help="Audio cache to replay (default: cache/audio)")
+
+def behaviour_from_args(args: argparse.Namespace) -> Behaviour:
+    return Behaviour(args.latency / 1000, args.jitter / 1000, args.error_rate, args.burst_every, args.burst_len, args.seed)
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Local stand-in for the Youdao /jsonapi and /dictvoice endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_behaviour_args(parser)
+    args = parser.parse_args()
+
+    server = StubServer(behaviour_from_args(args), Recordings(args.record_db, args.audio_cache), args.host, args.port)
+    logger.info(f"Serving on {server.url}; run clients with YOUDAO_BASE_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Responses by status: {server.behaviour.counts}")
+
+if __name__ == "__main__":
+    main()
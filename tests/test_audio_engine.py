@@ -0,0 +1,162 @@
+import hashlib
+import random
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip("pydub")
+
+import audio_engine
+from pydub import AudioSegment
+from pydub.silence import detect_nonsilent
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = audio_engine.AudioCache(tmp_path / "audio", max_bytes=10)
+    monkeypatch.setattr(audio_engine, "_shared_cache", cache)
+    yield cache
+    cache.close()
+
+def test_evict_skips_pinned_entries(cache):
+    for i, word in enumerate(["a", "b", "c"]):
+        cache.put(word, 1, bytes([i]) * 8, audio_engine.KIND_PCM)
+    cache.pin("a", 1, audio_engine.KIND_PCM)
+
+    cache.evict()
+
+    assert cache.get("a", 1, audio_engine.KIND_PCM) == bytes([0]) * 8
+    assert cache.get("b", 1, audio_engine.KIND_PCM) is None
+
+    cache.unpin("a", 1, audio_engine.KIND_PCM)
+    cache.put("d", 1, bytes([3]) * 8, audio_engine.KIND_PCM)
+    cache.evict()
+    assert cache.get("a", 1, audio_engine.KIND_PCM) is None
+
+def test_pool_refetches_lost_clip(cache, monkeypatch):
+    pool = audio_engine.ClipPool()
+    pool.available.add(("word", "us"))
+    monkeypatch.setattr(audio_engine, "fetch_clip", lambda word, code: (200, b"\x01\x00" * 4, True, True))
+
+    assert pool.get("word", "us") == b"\x01\x00" * 4
+    assert pool.get("other", "us") is None
+
+def test_pool_raises_for_clip_it_cannot_recover(cache, monkeypatch):
+    pool = audio_engine.ClipPool()
+    pool.available.add(("word", "us"))
+    monkeypatch.setattr(audio_engine, "fetch_clip", lambda word, code: (404, None, False, False))
+
+    with pytest.raises(audio_engine.BuildError):
+        pool.get("word", "us")
+
+def run_pipeline(words, voices=("us",)):
+    pipeline = audio_engine.ClipPipeline(words, list(voices), fetch_threads=2, decode_workers=1)
+    return [(index, word, results) for index, word, results in pipeline.run()]
+
+def test_pipeline_decodes_in_spawned_workers(cache, monkeypatch):
+    # Undecodable MP3 data goes through the process pool and comes back as a missing clip
+    monkeypatch.setattr(audio_engine, "fetch_clip", lambda word, code: (200, b"not an mp3", False, False))
+
+    delivered = run_pipeline(["a", "b"])
+
+    assert [(index, word) for index, word, _ in delivered] == [(0, "a"), (1, "b")]
+    assert all(results["us"] == (200, None, False) for _, _, results in delivered)
+
+def run_with_deadline(fn, seconds=30):
+    outcome = []
+    thread = threading.Thread(target=lambda: outcome.append(fn()), daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert not thread.is_alive(), "pipeline hung"
+    return outcome[0]
+
+def test_pipeline_survives_raising_rate_limit_callback(cache, monkeypatch):
+    monkeypatch.setattr(audio_engine, "fetch_clip", lambda word, code: (429, None, False, False))
+    def on_rate_limit(word):
+        raise RuntimeError("callback failed")
+    pipeline = audio_engine.ClipPipeline(["a", "b"], ["us"], fetch_threads=2, decode_workers=1,
+                                         on_rate_limit=on_rate_limit)
+
+    delivered = run_with_deadline(lambda: list(pipeline.run()))
+
+    assert [results["us"] for _, _, results in delivered] == [(429, None, False)] * 2
+
+def test_decoded_clip_is_delivered_when_cache_write_fails(cache, monkeypatch):
+    def save_pcm(word, code, pcm):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(audio_engine.AudioUtils, "save_pcm", save_pcm)
+    pipeline = audio_engine.ClipPipeline(["a"], ["us"])
+    future = Future()
+    future.set_result(b"\x00\x01")
+
+    future.add_done_callback(lambda f: pipeline._on_decoded(0, "us", 200, False, f))
+
+    assert pipeline._done.get(timeout=1) == (0, "us", (200, b"\x00\x01", False))
+    assert not pipeline.stored.get((0, "us"))
+
+def test_put_survives_failing_eviction(cache, monkeypatch):
+    def evict():
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(cache, "evict", evict)
+    monkeypatch.setattr(cache, "EVICT_INTERVAL", 1)
+
+    assert cache.put("a", 1, b"clip")
+    assert cache.get("a", 1) == b"clip"
+
+def segment(parts, frame_rate=audio_engine.SAMPLE_RATE, channels=1, sample_width=2, seed=0):
+    """Interleaved samples built from (milliseconds, amplitude) parts; amplitude 0 is digital silence."""
+    rng = random.Random(seed)
+    samples = []
+    for ms, amp in parts:
+        samples.extend(rng.randint(-amp, amp) for _ in range(int(ms * frame_rate / 1000) * channels))
+    data = b"".join(s.to_bytes(sample_width, "little", signed=True) for s in samples)
+    return AudioSegment(data=data, sample_width=sample_width, frame_rate=frame_rate, channels=channels)
+
+def pydub_bounds(audio):
+    ranges = detect_nonsilent(audio, min_silence_len=audio_engine.TRIM_MIN_SILENCE_LEN,
+                              silence_thresh=audio_engine.TRIM_SILENCE_THRESH)
+    return (ranges[0][0], ranges[-1][1]) if ranges else None
+
+@pytest.mark.parametrize("audio", [
+    pytest.param(segment([(120, 0), (200, 8000), (150, 0)]), id="leading-and-trailing"),
+    pytest.param(segment([(200, 8000), (80, 20)]), id="trailing-only"),
+    pytest.param(segment([(90, 30), (200, 8000)]), id="leading-only"),
+    pytest.param(segment([(300, 0)]), id="all-silence"),
+    pytest.param(segment([(300, 8000)]), id="all-sound"),
+    pytest.param(segment([(60, 0), (100, 5000), (200, 0), (100, 5000), (60, 0)]), id="gap-inside"),
+    pytest.param(segment([(49, 0)]), id="shorter-than-window"),
+    pytest.param(segment([(50, 0)]), id="exactly-one-window"),
+    pytest.param(segment([(51, 0)]), id="one-ms-past-window"),
+    pytest.param(segment([(25, 0), (26, 8000)]), id="window-plus-one-mixed"),
+    pytest.param(segment([(50, 8000), (50, 0)]), id="two-windows"),
+    pytest.param(segment([(70, 0), (130, 6000), (70, 0)], frame_rate=22050), id="fractional-frames-per-ms"),
+    pytest.param(segment([(70, 0), (130, 6000), (70, 0)], frame_rate=11025), id="odd-frame-rate"),
+    pytest.param(segment([(80, 0), (150, 6000), (80, 0)], channels=2), id="stereo"),
+    pytest.param(segment([(80, 0), (150, 100), (80, 0)], sample_width=1), id="8-bit"),
+])
+def test_nonsilent_bounds_matches_pydub(audio):
+    assert audio_engine.AudioUtils.nonsilent_bounds(audio) == pydub_bounds(audio)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_nonsilent_bounds_matches_pydub_on_noisy_clips(seed):
+    rng = random.Random(seed)
+    parts = [(rng.randint(0, 150), rng.choice([0, 40, 60]))]
+    for _ in range(rng.randint(1, 3)):
+        parts += [(rng.randint(30, 150), rng.choice([300, 3000, 20000])), (rng.randint(0, 120), rng.choice([0, 60]))]
+    audio = segment(parts, channels=rng.choice([1, 2]), seed=seed)
+    assert audio_engine.AudioUtils.nonsilent_bounds(audio) == pydub_bounds(audio)
+
+def test_put_replacing_a_clip_removes_its_unreferenced_blob(cache):
+    old = hashlib.sha1(b"old clip").hexdigest()
+    cache.put("a", 1, b"old clip")
+    cache.put("b", 1, b"shared")
+    cache.put("c", 1, b"shared")
+
+    cache.put("a", 1, b"new clip")
+    cache.put("b", 1, b"other")
+
+    assert not cache.blob_path(old).exists()
+    assert cache.blob_path(hashlib.sha1(b"shared").hexdigest()).exists() # still used by "c"
+    assert cache.get("a", 1) == b"new clip"
+    assert cache.get("c", 1) == b"shared"
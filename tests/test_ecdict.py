@@ -0,0 +1,39 @@
+import sqlite3
+
+import ecdict
+
+def make_db(path, words):
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE ecdict (word TEXT COLLATE NOCASE, british_phonetic TEXT, american_phonetic TEXT, "
+        "definition TEXT, translation TEXT, pos TEXT, collins INTEGER, oxford INTEGER, tag TEXT, "
+        "bnc INTEGER, frq INTEGER, exchange TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO ecdict VALUES (?, '', '', '', ?, '', 0, 0, '', 0, 0, '')",
+        [(word, f"tr:{word}") for word in words]
+    )
+    conn.commit()
+    conn.close()
+
+def test_lookup_many_keys_rows_by_requested_word(tmp_path):
+    db_path = tmp_path / "ecdict.db"
+    make_db(db_path, ["internet", "dutch", "apple"])
+    lookup = ecdict.EcdictLookup(db_path)
+    try:
+        rows = lookup.lookup_many(["Internet", "Dutch", "apple", "missing"])
+    finally:
+        lookup.close()
+    assert set(rows) == {"Internet", "Dutch", "apple"}
+    assert rows["Internet"][0] == "internet"
+
+def test_lookup_many_prefers_exact_spelling(tmp_path):
+    db_path = tmp_path / "ecdict.db"
+    make_db(db_path, ["mars", "Mars"])
+    lookup = ecdict.EcdictLookup(db_path)
+    try:
+        rows = lookup.lookup_many(["Mars", "mars"])
+    finally:
+        lookup.close()
+    assert rows["Mars"][4] == "tr:Mars"
+    assert rows["mars"][4] == "tr:mars"
@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+import ecdict
+import tech
+from test_ecdict import make_db
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Isolate the response cache and ECDICT database in a temporary directory."""
+    real_cache = tech.ResponseCache
+    monkeypatch.setattr(tech, "ResponseCache", lambda: real_cache(tmp_path / "youdao.db"))
+    monkeypatch.setattr(ecdict, "DB_PATH", tmp_path / "ecdict.db")
+    return tmp_path
+
+def write_vocab(path, words):
+    data = {"name": path.stem, "wordList": [{"value": word, "usphone": "", "ukphone": "", "translation": ""} for word in words]}
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=4), encoding="utf-8")
+
+def read_words(path):
+    return {item["value"]: item for item in json.loads(path.read_text(encoding="utf-8"))["wordList"]}
+
+def test_ecdict_source_mixed_case_vocabulary(workspace):
+    make_db(workspace / "ecdict.db", ["dutch", "greek", "apple"])
+    vocab = workspace / "words.json"
+    write_vocab(vocab, ["Dutch", "Greek", "apple", "Nowhere"])
+
+    tech.action_many([vocab], source=tech.SOURCE_ECDICT)
+
+    items = read_words(vocab)
+    assert items["Dutch"]["translation"] == "tr:dutch"
+    assert items["Greek"]["translation"] == "tr:greek"
+    assert items["apple"]["translation"] == "tr:apple"
+    assert items["Nowhere"]["translation"] == ""
+
+def write_journal(vocab, settings, entries):
+    lines = [{"settings": settings}] + [{"value": word, "fields": fields} for word, fields in entries.items()]
+    journal = vocab.with_name(f".{vocab.name}.journal")
+    journal.write_text("".join(json.dumps(line) + "\n" for line in lines), encoding="utf-8")
+    return journal
+
+def test_journal_resumes_with_same_settings(workspace):
+    make_db(workspace / "ecdict.db", ["apple"])
+    vocab = workspace / "words.json"
+    write_vocab(vocab, ["apple"])
+    journal = write_journal(vocab, {"policy": tech.POLICY_MISSING, "source": tech.SOURCE_ECDICT, "max_age_days": tech.MAX_AGE_DAYS},
+                            {"apple": {"translation": "from journal"}})
+
+    tech.action_many([vocab], source=tech.SOURCE_ECDICT)
+
+    assert read_words(vocab)["apple"]["translation"] == "from journal"
+    assert not journal.exists()
+
+def test_journal_from_other_settings_is_ignored(workspace):
+    make_db(workspace / "ecdict.db", ["apple"])
+    vocab = workspace / "words.json"
+    write_vocab(vocab, ["apple"])
+    journal = write_journal(vocab, {"policy": tech.POLICY_MISSING, "source": tech.SOURCE_ECDICT, "max_age_days": tech.MAX_AGE_DAYS},
+                            {"apple": {"translation": "from journal"}})
+
+    tech.action_many([vocab], policy=tech.POLICY_FORCE, source=tech.SOURCE_ECDICT)
+
+    assert read_words(vocab)["apple"]["translation"] == "tr:apple"
+    assert not journal.exists()
+
+def test_journal_of_up_to_date_file_is_discarded(workspace):
+    vocab = workspace / "words.json"
+    vocab.write_text(json.dumps({"wordList": [{"value": "apple", "usphone": "/a/", "ukphone": "/a/", "translation": "x"}]}),
+                     encoding="utf-8")
+    journal = write_journal(vocab, {"policy": tech.POLICY_MISSING, "source": tech.SOURCE_ECDICT, "max_age_days": tech.MAX_AGE_DAYS},
+                            {"apple": {"translation": "stale"}})
+
+    tech.action_many([vocab], source=tech.SOURCE_ECDICT)
+
+    assert not journal.exists()
+    assert read_words(vocab)["apple"]["translation"] == "x"
+
+def test_word_record_skips_non_string_translations():
+    data = {"ec": {"word": [{"usphone": "us", "trs": [
+        {"tr": [{"l": {"i": ["n. first"]}}]},
+        {"tr": [{"l": {"i": [{"#text": "markup", "@action": ""}]}}]},
+        {"tr": [{"l": {"i": ["v. second"]}}]},
+    ]}]}}
+    record = tech.WordRecord.from_response("word", data)
+    assert record.translations == ("n. first", "v. second")
+    assert tech.word_fields(record) == {"usphone": "/us/", "translation": "n. first\nv. second",
+                                        "definition": "", "pos": ""}
+
+def test_manager_halves_on_rate_limit():
+    manager = tech.ConcurrencyManager(initial_limit=8)
+    manager.report_error()
+    assert manager.current_limit == 4
+
+def test_manager_halves_once_per_cooldown():
+    manager = tech.ConcurrencyManager(initial_limit=8)
+    manager.report_error()
+    manager.report_error()
+    assert manager.current_limit == 4
+    manager._last_decrease -= manager.decrease_cooldown
+    manager.report_error()
+    assert manager.current_limit == 2
+
+def test_manager_recovers_after_lasting_latency_shift():
+    manager = tech.ConcurrencyManager(initial_limit=8)
+    for _ in range(100):
+        manager.report_success(0.05)
+    manager.report_error()
+    assert manager.current_limit == 4
+    for _ in range(2000):
+        manager.report_success(0.15)
+    assert manager.current_limit == 8
+
+def test_manager_holds_limit_on_sudden_latency_rise():
+    manager = tech.ConcurrencyManager(initial_limit=8)
+    for _ in range(100):
+        manager.report_success(0.05)
+    manager.report_error()
+    for _ in range(20):
+        manager.report_success(0.5)
+    assert manager.current_limit == 4
+
+def test_journal_from_other_max_age_is_ignored(workspace):
+    make_db(workspace / "ecdict.db", ["apple"])
+    vocab = workspace / "words.json"
+    write_vocab(vocab, ["apple"])
+    journal = write_journal(vocab, {"policy": tech.POLICY_STALE, "source": tech.SOURCE_ECDICT, "max_age_days": 30},
+                            {"apple": {"translation": "from journal"}})
+
+    tech.action_many([vocab], policy=tech.POLICY_STALE, max_age_days=7, source=tech.SOURCE_ECDICT)
+
+    assert read_words(vocab)["apple"]["translation"] == "tr:apple"
+    assert not journal.exists()
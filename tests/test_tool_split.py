@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+import tool_split
+
+def write(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=4), encoding="utf-8")
+
+def test_split_merges_trailer_fields_into_every_part(tmp_path):
+    source = tmp_path / "unit.json"
+    write(source, {"name": "Unit1", "wordList": [{"value": f"w{i}"} for i in range(45)], "size": 45, "note": "尾"})
+
+    paths = tool_split.split_file(str(source))
+
+    parts = [json.loads(open(p, encoding="utf-8").read()) for p in paths]
+    assert [part["name"] for part in parts] == ["Unit1-1", "Unit1-2", "Unit1-3"]
+    assert [part["size"] for part in parts] == [20, 20, 5]
+    assert all(list(part) == ["name", "wordList", "size", "note"] for part in parts)
+    assert all(part["note"] == "尾" for part in parts)
+
+def test_split_of_truncated_file_writes_nothing(tmp_path):
+    source = tmp_path / "broken.json"
+    text = json.dumps({"name": "U", "wordList": [{"value": f"w{i}"} for i in range(60)]}, indent=4)
+    source.write_text(text[:len(text) * 3 // 4], encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        tool_split.split_file(str(source))
+
+    assert [p.name for p in tmp_path.iterdir()] == ["broken.json"]
+
+def test_write_parts_removes_written_parts_on_failure(tmp_path):
+    def parts():
+        yield {"name": "U-1", "wordList": []}
+        raise ValueError("cut short")
+
+    with pytest.raises(ValueError):
+        tool_split.write_parts(str(tmp_path / "U"), parts())
+
+    assert list(tmp_path.iterdir()) == []
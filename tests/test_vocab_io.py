@@ -0,0 +1,97 @@
+import json
+import os
+import stat
+
+import pytest
+
+import vocab_io
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+def test_atomic_write_keeps_existing_permissions(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("{}", encoding="utf-8")
+    os.chmod(path, 0o640)
+    assert vocab_io.atomic_write_json(path, {"changed": True})
+    assert mode(path) == 0o640
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+def test_atomic_write_new_file_follows_umask(tmp_path):
+    path = tmp_path / "new.json"
+    vocab_io.atomic_write_json(path, {"new": True})
+    assert mode(path) == 0o666 & ~vocab_io._UMASK
+
+NUMBERS_DOCUMENT = '{"name": "n", "wordList": [2.5e3, -17, 0.125, 1E-2, 42, {"frq": 123456}], "size": 6}'
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 11, 64, 4096])
+def test_reader_numbers_across_chunk_boundaries(tmp_path, chunk_size):
+    path = tmp_path / "numbers.json"
+    path.write_text(NUMBERS_DOCUMENT, encoding="utf-8")
+    with vocab_io.VocabReader(path, chunk_size=chunk_size) as reader:
+        items = list(reader)
+        header = reader.header
+    assert items == [2.5e3, -17, 0.125, 1e-2, 42, {"frq": 123456}]
+    assert header == {"name": "n", "size": 6}
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 11, 4096])
+def test_reader_rejects_malformed_number(tmp_path, chunk_size):
+    path = tmp_path / "bad.json"
+    path.write_text('{"wordList": [2.]}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        with vocab_io.VocabReader(path, chunk_size=chunk_size) as reader:
+            list(reader)
+
+def dumped(data):
+    return json.dumps(data, ensure_ascii=False, indent=4)
+
+ROUND_TRIP_DOCUMENTS = [
+    {"name": "词库", "type": "word", "wordList": [
+        {"value": "café", "translation": "n. 咖啡馆\nn. 小餐馆", "captions": [], "tags": {"a": [1, 2.5, None, True]}},
+        {"value": "naïve", "usphone": "/naɪˈiv/", "collins": 0, "oxford": False},
+    ], "size": 2, "尾部": {"note": "after wordList"}},
+    {"name": "empty", "wordList": [], "size": 0},
+    {"wordList": [], "after": "only a trailer"},
+    {"name": "scalars", "wordList": ["字符串", 3, -0.5, [], {}]},
+]
+
+@pytest.mark.parametrize("data", ROUND_TRIP_DOCUMENTS)
+def test_writer_matches_json_dump(tmp_path, data):
+    path = tmp_path / "out.json"
+    leading = {}
+    for key, value in data.items():
+        if key == "wordList":
+            break
+        leading[key] = value
+    trailer = {key: value for key, value in data.items() if key not in leading and key != "wordList"}
+
+    writer = vocab_io.VocabWriter(path, leading)
+    for item in data["wordList"]:
+        writer.write(item)
+    writer.close(trailer)
+
+    assert path.read_text(encoding="utf-8") == dumped(data)
+
+@pytest.mark.parametrize("data", ROUND_TRIP_DOCUMENTS)
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_rewrite_identity_is_byte_identical(tmp_path, data, chunk_size, monkeypatch):
+    path = tmp_path / "vocab.json"
+    path.write_text(dumped(data), encoding="utf-8")
+    monkeypatch.setattr(vocab_io, "CHUNK_SIZE", chunk_size)
+
+    vocab_io.rewrite(path, lambda item: item)
+
+    assert path.read_text(encoding="utf-8") == dumped(data)
+    with vocab_io.VocabReader(path, chunk_size=chunk_size) as reader:
+        assert list(reader) == data["wordList"]
+
+def test_rewrite_applies_transform_and_keeps_layout(tmp_path):
+    data = ROUND_TRIP_DOCUMENTS[0]
+    path = tmp_path / "vocab.json"
+    path.write_text(dumped(data), encoding="utf-8")
+
+    vocab_io.rewrite(path, lambda item: {**item, "translation": "已更新"})
+
+    expected = dict(data, wordList=[{**item, "translation": "已更新"} for item in data["wordList"]])
+    assert path.read_text(encoding="utf-8") == dumped(expected)